@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+"""
+Headless-запуск режима сетки (без Qt и дисплея)
+
+Читает CSV или JSONL с колонками country, theme, domain[, language, city],
+прогоняет каждую строку через тот же конвейер, что и GUI (ZIP-маркер,
+структура проекта с изображениями, промпт), с заданным числом воркеров
+и пишет машиночитаемый журнал результатов (JSONL, по строке на задачу).
+
+Пример:
+    python batch_cli.py jobs.csv --output-dir ./out --workers 8 --log results.jsonl
+
+Прогресс пишется в журнал партии (.batch_journal.jsonl в папке вывода): повторный
+запуск с тем же входом пропускает готовые проекты и догенерирует только недостающие изображения.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+from core.build_pipeline import build_landing
+from core.cursor_manager import CursorManager
+from core.job_journal import JobJournal
+from core.job_scheduler import JobScheduler
+from shared.city_generator import CityGenerator
+from shared.helpers import get_language_by_country, sanitize_filename, validate_domain
+from shared.settings_manager import get_settings_manager
+
+
+def _cell(value):
+    # Значения JSONL могут быть числом/null — приводим к строке, как в CSV
+    return "" if value is None else str(value).strip()
+
+
+def read_jobs(path):
+    """
+    Читает задачи из CSV (с заголовком) или JSONL
+
+    Строка JSONL, которая не является JSON-объектом, не прерывает партию:
+    она попадает в результат с ключом "_error" и отклоняется в build_params
+    """
+    path = Path(path)
+    rows = []
+    if path.suffix.lower() in (".jsonl", ".ndjson"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = {"_error": f"Строка {line_no}: некорректный JSON ({e})"}
+                if not isinstance(row, dict):
+                    row = {"_error": f"Строка {line_no}: ожидался JSON-объект"}
+                rows.append(row)
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+    return [
+        row if "_error" in row else {str(k).strip().lower(): _cell(v) for k, v in row.items() if k}
+        for row in rows
+    ]
+
+
+def build_params(rows, output_dir, no_images):
+    """
+    Превращает строки входного файла в параметры задач (как в режиме сетки GUI)
+
+    Returns:
+        tuple: (params_list, invalid) - задачи и отклонённые строки с причиной
+    """
+    cities = CityGenerator()
+    params_list, invalid = [], []
+    validated = []
+    domain_counts = {}
+    for line_no, row in enumerate(rows, start=1):
+        if "_error" in row:
+            invalid.append({"line": line_no, "domain": "", "status": "invalid", "error": row["_error"]})
+            continue
+        country, theme = row.get("country", ""), row.get("theme", "")
+        if not country or not theme:
+            invalid.append({"line": line_no, "domain": row.get("domain", ""), "status": "invalid", "error": "Не указана страна или тематика"})
+            continue
+        ok, err, fixed = validate_domain(row.get("domain", ""))
+        if not ok:
+            invalid.append({"line": line_no, "domain": row.get("domain", ""), "status": "invalid", "error": err})
+            continue
+        validated.append((line_no, row, fixed))
+        domain_counts[fixed] = domain_counts.get(fixed, 0) + 1
+    for job_id, (line_no, row, domain) in enumerate(validated, start=1):
+        country, theme = row["country"], row["theme"]
+        # Повторяющийся домен — добавляем тематику и индекс к имени папки
+        duplicated = domain_counts[domain] >= 2
+        params_list.append({
+            "id": job_id,
+            "line": line_no,
+            "save_path": str(output_dir),
+            "country": country,
+            "theme": theme,
+            "domain": domain,
+            "folder_name": f"{domain}_{sanitize_filename(theme)}" if duplicated else domain,
+            "needs_index": duplicated,
+            "city": row.get("city") or cities.get_random_city(country),
+            "language": row.get("language") or get_language_by_country(country),
+            "no_images": no_images,
+            "cancel_event": threading.Event(),
+        })
+    return params_list, invalid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная генерация лендингов без GUI")
+    parser.add_argument("input", help="CSV или JSONL: country, theme, domain[, language, city]")
+    parser.add_argument("--output-dir", help="Папка для проектов (по умолчанию — из настроек)")
+    parser.add_argument("--workers", type=int, default=4, help="Сколько лендингов собирать параллельно")
+    parser.add_argument("--log", default="batch_results.jsonl", help="Журнал результатов (JSONL)")
+    parser.add_argument("--no-images", action="store_true", help="Не генерировать изображения")
+    parser.add_argument("--fresh", action="store_true", help="Игнорировать журнал партии и собрать всё заново")
+    args = parser.parse_args(argv)
+
+    settings = get_settings_manager()
+    output_dir = Path(args.output_dir or settings.get_save_path())
+    output_dir.mkdir(parents=True, exist_ok=True)
+    has_key = bool(settings.get_ideogram_api_key())
+    generate_images = has_key and not args.no_images
+    if not has_key and not args.no_images:
+        print("⚠️ Ideogram API ключ не задан — проекты будут созданы без изображений")
+
+    params_list, invalid = build_params(read_jobs(args.input), output_dir, not generate_images)
+    cursor_manager = CursorManager()
+    log_lock = threading.Lock()
+    journal = JobJournal(output_dir)
+    counters = {"ok": 0, "incomplete": 0, "error": 0, "cancelled": 0, "invalid": len(invalid), "skipped": 0}
+
+    with open(args.log, "w", encoding="utf-8") as log:
+        def write_result(record):
+            with log_lock:
+                log.write(json.dumps(record, ensure_ascii=False) + "\n")
+                log.flush()
+
+        for record in invalid:
+            write_result(record)
+
+        def run_job(params):
+            started = time.monotonic()
+            record = {
+                "id": params["id"], "line": params["line"], "domain": params["domain"],
+                "theme": params["theme"], "country": params["country"], "language": params["language"],
+            }
+            try:
+                built = build_landing(params, cursor_manager, generate_images,
+                                      lambda text: print(f"[{params['id']}] {text}"), journal=journal)
+                media = Path(built["media_path"])
+                status = "cancelled" if built["cancelled"] else ("incomplete" if built.get("missing_slots") else "ok")
+                record.update({
+                    "status": status,
+                    "project_path": str(built["project_path"]),
+                    "images": len(list(media.glob("*.jpg")) + list(media.glob("*.png"))),
+                    "prompt": built["prompt"],
+                })
+                if built.get("missing_slots"):
+                    record["missing_slots"] = built["missing_slots"]
+            except Exception as e:
+                record.update({"status": "error", "error": str(e)})
+            record["duration_s"] = round(time.monotonic() - started, 3)
+            with log_lock:
+                counters[record["status"]] += 1
+            write_result(record)
+
+        scheduler = JobScheduler(max(1, args.workers), thread_name_prefix="batch")
+        started = time.monotonic()
+        for params in params_list:
+            # Повторный запуск после сбоя: завершённые по журналу задачи пропускаем,
+            # у незавершённых догенерируются только недостающие изображения
+            if not args.fresh and journal.is_done(journal.job_key(params)):
+                counters["skipped"] += 1
+                write_result({"id": params["id"], "line": params["line"], "domain": params["domain"], "status": "skipped"})
+                continue
+            journal.record_job(params)
+            scheduler.submit(params, run_job)
+        try:
+            scheduler.wait()
+        except KeyboardInterrupt:
+            print("⏹️ Остановка: текущие задачи будут завершены, очередь отменена")
+            scheduler.cancel_all()
+            scheduler.wait()
+        scheduler.shutdown()
+        elapsed = time.monotonic() - started
+
+    done = counters["ok"]
+    rate = (done / elapsed * 60) if elapsed > 0 else 0.0
+    print(f"✅ Готово: {done}, без части изображений: {counters['incomplete']}, ошибок: {counters['error']}, отменено: {counters['cancelled']}, "
+          f"отклонено: {counters['invalid']}, пропущено: {counters['skipped']} за {elapsed:.1f}с ({rate:.1f} лендингов/мин)")
+    print(f"📄 Журнал: {args.log}")
+    if counters["incomplete"]:
+        print("↩️ Повторный запуск с тем же входом догенерирует недостающие изображения")
+    return 0 if counters["error"] == 0 and counters["incomplete"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,16 @@
 Основные компоненты приложения
 """ 
 
-from .cursor_manager import CursorManager
 
-try:
-    from .update_checker import UpdateChecker  # optional
-except Exception:
-    UpdateChecker = None  # type: ignore
\ No newline at end of file
+def __getattr__(name):
+    # Ленивый экспорт: импорт пакета core (например, core.startup_profile) не тянет cursor_manager
+    if name == "CursorManager":
+        from .cursor_manager import CursorManager
+        return CursorManager
+    if name == "UpdateChecker":
+        try:
+            from .update_checker import UpdateChecker  # optional
+        except Exception:
+            UpdateChecker = None  # type: ignore
+        return UpdateChecker
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
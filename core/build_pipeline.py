@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+"""
+Конвейер сборки одного лендинга (общий для GUI и headless-режима)
+ZIP-маркер -> структура проекта и изображения -> промпт
+"""
+
+from pathlib import Path
+
+from shared.helpers import ensure_empty_zip_for_landing, get_language_by_country
+from generators.prompt_generator import build_landing_prompt_params, get_landing_template
+
+
+def resolve_project_folder(params):
+    """
+    Возвращает имя папки проекта для задачи
+
+    Имя формируется заранее при постановке в очередь (folder_name);
+    порядковый id добавляется только при возможных коллизиях (needs_index)
+    """
+    base_folder = params.get("folder_name") or params["domain"]
+    if params.get("needs_index"):
+        return f"{base_folder}_{params['id']}"
+    return base_folder
+
+
+def build_landing(params, cursor_manager, generate_images, progress_callback=None, journal=None):
+    """
+    Выполняет сборку лендинга по параметрам задачи
+
+    Args:
+        params (dict): save_path, country, theme, domain, city, language, custom_prompt, id, cancel_event...
+        cursor_manager (CursorManager): Менеджер для создания структуры проекта
+        generate_images (bool): Генерировать ли изображения
+        progress_callback (callable): Функция обратного вызова для статуса
+        journal (JobJournal): Журнал партии — готовые слоты пропускаются, новые и завершение фиксируются
+
+    Returns:
+        dict: zip_path, project_path, media_path, prompt (None, если задача отменена), cancelled;
+              missing_slots (неполученные изображения); для промпта из шаблона также
+              prompt_template_version и prompt_params
+    """
+    cancel = params.get("cancel_event")
+    folder = resolve_project_folder(params)
+    if cancel and cancel.is_set():
+        # Задача отменена, пока ждала в очереди — ничего не создаём на диске
+        project_path = Path(params["save_path"]) / folder
+        return {"zip_path": None, "project_path": project_path, "media_path": project_path / "media",
+                "prompt": None, "cancelled": True}
+    zip_path = ensure_empty_zip_for_landing(params["save_path"], params["country"], params["theme"])
+    if zip_path:
+        print(f"ZIP создан: {zip_path}")
+    skip_slots, on_slot_done = None, None
+    if journal is not None:
+        skip_slots = journal.completed_slots(folder, Path(params["save_path"]) / folder / "media")
+        on_slot_done = lambda slot, path: journal.record_image(folder, slot, path)
+    project_path, media_path = cursor_manager.create_project_structure(
+        folder, params["save_path"], params["theme"], progress_callback,
+        generate_images=generate_images, cancel_check=(lambda: bool(cancel.is_set())) if cancel else None,
+        skip_slots=skip_slots, on_slot_done=on_slot_done,
+    )
+    result = {
+        "zip_path": zip_path,
+        "project_path": project_path,
+        "media_path": media_path,
+        "prompt": None,
+        "cancelled": bool(cancel and cancel.is_set()),
+    }
+    if result["cancelled"]:
+        return result
+    language = params.get("language") or get_language_by_country(params["country"])
+    if params.get("custom_prompt"):
+        result["prompt"] = params["custom_prompt"]
+    else:
+        # Версию шаблона и значения слотов возвращаем вместе с промптом: история хранит только их
+        template = get_landing_template()
+        prompt_params = build_landing_prompt_params(params["country"], params["city"], language, params["domain"], params["theme"])
+        result.update(prompt=template.render(**prompt_params), prompt_template_version=template.version, prompt_params=prompt_params)
+    result["missing_slots"] = _missing_slots(params, generate_images, media_path, journal, folder)
+    # Задача с недостающими изображениями остаётся незавершённой: при возобновлении
+    # партии она будет собрана снова, и догенерируются только пропущенные слоты
+    if journal is not None and not result["missing_slots"]:
+        journal.record_done(folder)
+    return result
+
+
+def _missing_slots(params, generate_images, media_path, journal, folder):
+    """Слоты изображений, которые должны были появиться в media, но отсутствуют"""
+    from core.cursor_manager import is_image_generation_available
+
+    if not (generate_images and params.get("theme") and is_image_generation_available()):
+        return []
+    from generators.ideogram_generator import build_landing_slots
+
+    expected = [slot.name for slot in build_landing_slots(params["theme"])]
+    if journal is not None:
+        done = journal.completed_slots(folder, media_path)
+    else:
+        done = {f.stem for f in Path(media_path).glob("*") if f.suffix.lower() in (".jpg", ".png")}
+    return [name for name in expected if name not in done]
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""
+Последовательный запуск Cursor для проектов (одна очередь на приложение)
+Открытия не идут параллельно из рабочих потоков сборок, а по очереди передаются
+уже запущенному экземпляру Cursor (CLI --reuse-window / --add)
+"""
+
+import queue
+import subprocess
+import threading
+from concurrent.futures import Future
+
+# Режим открытия проекта -> аргументы CLI Cursor (как у VS Code)
+OPEN_MODES = {
+    "new_window": (),  # отдельное окно на каждый проект (прежнее поведение)
+    "reuse_window": ("--reuse-window",),  # открыть в последнем активном окне
+    "add": ("--add",),  # добавить папку в текущее рабочее пространство
+}
+DEFAULT_OPEN_MODE = "new_window"
+
+
+class CursorLauncher:
+    """Очередь открытий проектов в Cursor с одним потоком-диспетчером"""
+
+    def __init__(self, cursor_manager, mode=DEFAULT_OPEN_MODE, handoff_timeout=10.0):
+        """
+        Args:
+            cursor_manager (CursorManager): Поиск исполняемого файла и запуск под ОС
+            mode (str): Режим открытия (ключ OPEN_MODES)
+            handoff_timeout (float): Сколько ждать, пока CLI передаст проект запущенному Cursor
+        """
+        self.cursor_manager = cursor_manager
+        self.mode = mode
+        self.handoff_timeout = handoff_timeout
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @mode.setter
+    def mode(self, value):
+        self._mode = value if value in OPEN_MODES else DEFAULT_OPEN_MODE
+
+    def open(self, project_path) -> Future:
+        """
+        Ставит открытие проекта в очередь
+
+        Returns:
+            Future: результат — bool (удалось ли открыть проект)
+        """
+        future: Future = Future()
+        self._ensure_thread()
+        self._queue.put((project_path, future))
+        return future
+
+    def _ensure_thread(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="cursor-launcher", daemon=True)
+                self._thread.start()
+
+    def _worker(self):
+        while True:
+            project_path, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._open_now(project_path))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _open_now(self, project_path) -> bool:
+        cm = self.cursor_manager
+        cursor_exe = cm.find_cursor_executable()
+        if not cursor_exe:
+            return False
+        # Универсальная проверка на уже запущенный Cursor (для всех ОС)
+        if cm._is_cursor_already_running_with_project(project_path):
+            print(f"Cursor уже запущен с проектом: {project_path}")
+            return True
+        proc = cm.launch_cursor(cursor_exe, project_path, OPEN_MODES[self.mode])
+        if proc is None:
+            return False
+        if self.mode != "new_window":
+            # CLI передаёт папку работающему экземпляру и завершается —
+            # следующий проект отправляем только после этого, чтобы окна не перепутались
+            try:
+                proc.wait(timeout=self.handoff_timeout)
+            except subprocess.TimeoutExpired:
+                pass
+        return True
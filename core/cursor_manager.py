@@ -5,28 +5,57 @@
 Кроссплатформенная версия (Windows/Linux/macOS)
 """
 
+import json
 import os
+import shutil
 import subprocess
+import sys
+import threading
 import time
 import platform
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+
+from core.cursor_launcher import CursorLauncher, DEFAULT_OPEN_MODE
+from core.fs_scan import FsScanner
+from core.process_table import get_process_table
 tk = None  # Tkinter больше не используется
 
-# Проверяем доступность pyautogui
-try:
-    import pyautogui
-    PYAUTOGUI_AVAILABLE = True
-except ImportError:
-    PYAUTOGUI_AVAILABLE = False
-    print("⚠️ pyautogui недоступен, автовставка промптов отключена")
+# Найденный путь к Cursor сохраняется между запусками (проверяется по mtime/inode файла)
+CURSOR_CACHE_FILE = Path.home() / ".landing_generator_cursor_cache.json"
+
+# Тяжёлые зависимости (pyautogui, генерация изображений: requests/PIL) загружаются
+# при первом использовании, а не при импорте модуля — это ускоряет запуск приложения
+_pyautogui = None
+_pyautogui_checked = False
+_image_generation_available = None
+
 
-# Импорт для генерации изображений (Ideogram)
-try:
-    from generators.ideogram_generator import IdeogramGenerator
-    IMAGE_GENERATION_AVAILABLE = True
-except ImportError as e:
-    IMAGE_GENERATION_AVAILABLE = False
-    print(f"⚠️ Модуль генерации изображений недоступен: {e}")
+def _get_pyautogui():
+    """Возвращает модуль pyautogui (импорт при первом вызове) или None, если он недоступен"""
+    global _pyautogui, _pyautogui_checked
+    if not _pyautogui_checked:
+        _pyautogui_checked = True
+        try:
+            import pyautogui
+            _pyautogui = pyautogui
+        except Exception:
+            # Без дисплея (headless) pyautogui падает не ImportError, а ошибкой подключения к X
+            print("⚠️ pyautogui недоступен, автовставка промптов отключена")
+    return _pyautogui
+
+
+def is_image_generation_available():
+    """Проверяет (один раз) доступность модуля генерации изображений (Ideogram)"""
+    global _image_generation_available
+    if _image_generation_available is None:
+        try:
+            import generators.ideogram_generator  # noqa: F401
+            _image_generation_available = True
+        except ImportError as e:
+            _image_generation_available = False
+            print(f"⚠️ Модуль генерации изображений недоступен: {e}")
+    return _image_generation_available
 
 
 class CursorManager:
@@ -38,6 +67,12 @@ class CursorManager:
             "code"
         ]
         self.cached_cursor_path = None  # Кэш найденного пути
+        # Поиск выполняется одним потоком: остальные ждут его результата, а не ищут заново
+        self._discovery_lock = threading.Lock()
+        self._launcher = None
+        self._launcher_lock = threading.Lock()
+        # Ярлык .lnk -> путь к .exe (Windows)
+        self._shortcut_targets = {}
         self.os_type = platform.system().lower()
         
         print(f"🖥️ Определена ОС: {self.os_type}")
@@ -190,34 +225,27 @@ class CursorManager:
         full_path = Path(base_path) / dir_name
         return full_path.exists(), str(full_path)
     
-    def find_cursor_in_directories(self):
+    def find_cursor_in_directories(self, stop_event=None):
         """
         Глубокий поиск Cursor по основным директориям (кроссплатформенный)
         
+        Args:
+            stop_event (threading.Event): Прервать поиск (другая стратегия уже нашла Cursor)
+            
         Returns:
             str: Путь к Cursor AI или None если не найден
         """
-        search_dirs = self._get_search_directories()
-        
-        # Убираем None значения и проверяем существование
-        search_dirs = [d for d in search_dirs if d and os.path.exists(d)]
-        
-        for search_dir in search_dirs:
-            try:
-                for root, dirs, files in os.walk(search_dir):
-                    # Ограничиваем глубину поиска для скорости
-                    if root.count(os.sep) - search_dir.count(os.sep) > 3:
-                        continue
-                        
-                    for file in files:
-                        if self._is_cursor_file(file):
-                            full_path = os.path.join(root, file)
-                            if self._test_cursor_executable(full_path):
-                                print(f"Найден Cursor AI: {full_path}")
-                                return full_path
-            except (PermissionError, OSError):
-                continue
-        return None
+        # Обход через os.scandir: тяжёлые каталоги (node_modules, .git, .cache...) отсекаются
+        # до спуска, корни обходятся параллельно, общий лимит по времени и числу записей
+        scanner = FsScanner(max_depth=3)
+        found = scanner.find_first(
+            self._get_search_directories(), self._is_cursor_file, self._test_cursor_executable, stop_event=stop_event
+        )
+        if found:
+            print(f"Найден Cursor AI: {found}")
+        elif scanner.budget_exhausted:
+            print(f"⚠️ Глубокий поиск Cursor остановлен по лимиту (просмотрено записей: {scanner.entries_seen})")
+        return found
     
     def _get_search_directories(self):
         """Возвращает директории для поиска в зависимости от ОС"""
@@ -294,76 +322,136 @@ class CursorManager:
         """
         Ищет исполняемый файл Cursor AI - улучшенная версия
         
+        Сначала проверяется кэш (в памяти и на диске), затем стратегии поиска
+        запускаются параллельно и берётся первый найденный путь.
+        
         Returns:
             str: Путь к Cursor AI или None если не найден
         """
-        # Проверяем кэш
-        if self.cached_cursor_path and os.path.exists(self.cached_cursor_path):
-            print(f"Используется кэшированный путь: {self.cached_cursor_path}")
-            return self.cached_cursor_path
+        with self._discovery_lock:
+            # Проверяем кэш
+            if self.cached_cursor_path and self._cursor_path_exists(self.cached_cursor_path):
+                print(f"Используется кэшированный путь: {self.cached_cursor_path}")
+                return self.cached_cursor_path
+            
+            persisted = self._load_persisted_cursor_path()
+            if persisted:
+                print(f"Используется сохранённый путь к Cursor: {persisted}")
+                self.cached_cursor_path = persisted
+                return persisted
+            
+            print("Поиск Cursor AI...")
+            found = self._run_discovery_strategies()
+            if found:
+                self.cached_cursor_path = found
+                self._persist_cursor_path(found)
+                return found
         
-        print("Поиск Cursor AI...")
+        print("Cursor AI не найден автоматически")
+        return self.ask_for_cursor_path()
+    
+    def start_background_discovery(self):
+        """Запускает поиск Cursor в фоне (при старте приложения), чтобы первая сборка его не ждала"""
+        threading.Thread(target=self.find_cursor_executable, name="cursor-discovery", daemon=True).start()
+    
+    def _run_discovery_strategies(self):
+        """Запускает стратегии поиска параллельно и возвращает первый найденный путь"""
+        stop_event = threading.Event()
+        strategies = [self._find_cursor_in_path, self._find_cursor_in_known_paths]
+        if self.os_type == 'windows':
+            strategies += [self.find_cursor_in_registry, self.find_cursor_in_start_menu]
+        elif self.os_type == 'linux':
+            strategies.append(self.find_cursor_linux_commands)
+        strategies.append(lambda: self.find_cursor_in_directories(stop_event))
         
-        # 1. Проверяем команды в PATH
+        pool = ThreadPoolExecutor(max_workers=len(strategies), thread_name_prefix="cursor-find")
+        try:
+            futures = [pool.submit(strategy) for strategy in strategies]
+            for fut in as_completed(futures):
+                try:
+                    result = fut.result()
+                except Exception:
+                    continue
+                if result:
+                    return result
+            return None
+        finally:
+            # Остальные стратегии больше не нужны: глубокий поиск прерывается по stop_event
+            stop_event.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _find_cursor_in_path(self):
+        """Команды cursor/code в PATH"""
         for cmd in self.cursor_paths:
+            if not shutil.which(cmd):
+                continue
             try:
                 result = subprocess.run([cmd, "--version"], 
                                       capture_output=True, text=True, timeout=5,
                                       encoding='utf-8', errors='ignore')
                 if result.returncode == 0:
                     print(f"Найден Cursor в PATH: {cmd}")
-                    self.cached_cursor_path = cmd
                     return cmd
             except:
                 continue
-        
-        # 2. Проверяем известные пути
+        return None
+    
+    def _find_cursor_in_known_paths(self):
+        """Известные пути установки для текущей ОС"""
         for path in self.search_paths:
             try:
                 if path.endswith('.lnk'):
                     # Для .lnk файлов попробуем извлечь реальный путь
                     if os.path.exists(path):
                         print(f"Найдена ссылка Cursor: {path}")
-                        self.cached_cursor_path = path
                         return path
                 elif os.path.exists(path) and self._test_cursor_executable(path):
                     print(f"Найден Cursor: {path}")
-                    self.cached_cursor_path = path
                     return path
             except:
                 continue
-        
-        # 3. Поиск через системно-специфичные методы
-        if self.os_type == 'windows':
-            print("Поиск в реестре Windows...")
-            registry_result = self.find_cursor_in_registry()
-            if registry_result:
-                self.cached_cursor_path = registry_result
-                return registry_result
-        
-        # 4. Глубокий поиск по системе
-        print("Выполняется глубокий поиск по системе...")
-        deep_search_result = self.find_cursor_in_directories()
-        if deep_search_result:
-            self.cached_cursor_path = deep_search_result
-            return deep_search_result
-        
-        # 5. Поиск в системно-специфичных местах
-        if self.os_type == 'windows':
-            print("Поиск в Start Menu...")
-            start_menu_result = self.find_cursor_in_start_menu()
-            if start_menu_result:
-                self.cached_cursor_path = start_menu_result
-                return start_menu_result
-        elif self.os_type == 'linux':
-            print("Поиск через which/whereis...")
-            linux_result = self.find_cursor_linux_commands()
-            if linux_result:
-                self.cached_cursor_path = linux_result
-                return linux_result
-        
-        print("Cursor AI не найден автоматически")
-        return self.ask_for_cursor_path()
+        return None
+    
+    @staticmethod
+    def _cursor_path_exists(path):
+        """Путь к Cursor ещё действителен (файл существует или команда есть в PATH)"""
+        return os.path.exists(path) or bool(shutil.which(path))
+    
+    @staticmethod
+    def _stat_signature(path):
+        """Подпись файла для проверки сохранённого пути: (реальный путь, mtime_ns, inode, размер)"""
+        resolved = path if os.path.exists(path) else shutil.which(path)
+        if not resolved:
+            return None
+        st = os.stat(resolved)
+        return {"resolved": os.path.realpath(resolved), "mtime_ns": st.st_mtime_ns, "inode": st.st_ino, "size": st.st_size}
+    
+    def _load_persisted_cursor_path(self):
+        """Возвращает путь из дискового кэша, если файл не изменился с момента сохранения"""
+        try:
+            with open(CURSOR_CACHE_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("os") != self.os_type or not data.get("path"):
+                return None
+            signature = self._stat_signature(data["path"])
+            # Обновление/переустановка Cursor меняет mtime/inode — тогда ищем заново
+            if signature and all(signature[k] == data.get(k) for k in signature):
+                return data["path"]
+        except (OSError, ValueError):
+            pass
+        return None
+    
+    def _persist_cursor_path(self, path):
+        try:
+            signature = self._stat_signature(path)
+            if not signature:
+                return
+            # Уникальный временный файл: фоновый поиск и поиск из сборки (или два экземпляра приложения)
+            # не подменяют недописанный файл друг друга
+            from shared.settings_manager import _atomic_write_json
+            _atomic_write_json(CURSOR_CACHE_FILE, {"path": path, "os": self.os_type, **signature})
+        except OSError as e:
+            print(f"⚠️ Не удалось сохранить путь к Cursor: {e}")
     
     def find_cursor_in_registry(self):
         """
@@ -492,73 +580,125 @@ class CursorManager:
         Returns:
             bool: True если успешно, False иначе
         """
-        cursor_exe = self.find_cursor_executable()
-        
-        if not cursor_exe:
+        # Открытия из всех сборок идут через одну очередь (см. CursorLauncher)
+        try:
+            return bool(self.get_cursor_launcher().open(project_path).result())
+        except Exception as e:
+            print(f"Ошибка запуска Cursor: {e}")
             return False
+    
+    def get_cursor_launcher(self):
+        """Возвращает общую очередь открытий проектов (режим — из настройки cursor_open_mode)"""
+        with self._launcher_lock:
+            if self._launcher is None:
+                from shared.settings_manager import get_settings_manager
+                sm = get_settings_manager()
+                launcher = CursorLauncher(self, sm.snapshot().get("cursor_open_mode", DEFAULT_OPEN_MODE))
+                # Смена режима в настройках применяется к следующим открытиям
+                sm.subscribe(lambda cfg: setattr(launcher, "mode", cfg.get("cursor_open_mode", DEFAULT_OPEN_MODE)))
+                self._launcher = launcher
+            return self._launcher
+    
+    def launch_cursor(self, cursor_exe, project_path, extra_args=()):
+        """
+        Запускает CLI Cursor для проекта с учётом ОС
         
-        # Универсальная проверка на уже запущенный Cursor (для всех ОС)
-        if self._is_cursor_already_running_with_project(project_path):
-            print(f"Cursor уже запущен с проектом: {project_path}")
-            return True
-        
+        Args:
+            cursor_exe (str): Команда или путь к Cursor
+            project_path (Path): Путь к проекту
+            extra_args (tuple): Дополнительные аргументы CLI (--reuse-window, --add)
+            
+        Returns:
+            subprocess.Popen: Запущенный процесс или None при ошибке
+        """
         try:
             # Адаптируем команду запуска под ОС
             if self.os_type == 'windows':
-                return self._launch_cursor_windows(cursor_exe, project_path)
+                return self._launch_cursor_windows(cursor_exe, project_path, extra_args)
             elif self.os_type == 'linux':
-                return self._launch_cursor_linux(cursor_exe, project_path)
+                return self._launch_cursor_linux(cursor_exe, project_path, extra_args)
             elif self.os_type == 'darwin':  # macOS
-                return self._launch_cursor_macos(cursor_exe, project_path)
+                return self._launch_cursor_macos(cursor_exe, project_path, extra_args)
             else:
                 # Универсальный запуск
-                return self._launch_cursor_generic(cursor_exe, project_path)
+                return self._launch_cursor_generic(cursor_exe, project_path, extra_args)
         except Exception as e:
             print(f"Ошибка запуска Cursor: {e}")
-            return False
+            return None
+        finally:
+            # Запущен новый процесс — следующая проверка должна увидеть свежий список
+            get_process_table().invalidate()
     
-    def _launch_cursor_windows(self, cursor_exe, project_path):
+    def _launch_cursor_windows(self, cursor_exe, project_path, extra_args=()):
         """Запуск Cursor в Windows"""
         try:
             if cursor_exe in ["cursor", "code"]:
                 # Команды в PATH
-                subprocess.Popen([cursor_exe, str(project_path)], shell=True,
+                proc = subprocess.Popen([cursor_exe, *extra_args, str(project_path)], shell=True,
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             elif cursor_exe.endswith('.lnk'):
-                # Для .lnk файлов используем start
-                subprocess.Popen(['start', cursor_exe, str(project_path)], shell=True,
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                target = self._resolve_windows_shortcut(cursor_exe)
+                if target:
+                    # Запускаем цель ярлыка напрямую: аргументы CLI доходят до Cursor,
+                    # а ожидание процесса — это ожидание передачи проекта запущенному экземпляру
+                    proc = subprocess.Popen([target, *extra_args, str(project_path)],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                else:
+                    # Цель не определена — через start (пустой заголовок окна, /wait — чтобы дождаться CLI)
+                    proc = subprocess.Popen(['start', '', *(['/wait'] if extra_args else []), cursor_exe, *extra_args, str(project_path)],
+                                   shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             else:
                 # Прямой путь к .exe
-                subprocess.Popen([cursor_exe, str(project_path)],
+                proc = subprocess.Popen([cursor_exe, *extra_args, str(project_path)],
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
             print(f"Cursor AI запущен (Windows): {cursor_exe}")
-            return True
+            return proc
         except Exception as e:
             print(f"Ошибка запуска Cursor в Windows: {e}")
-            return False
+            return None
     
-    def _launch_cursor_linux(self, cursor_exe, project_path):
+    def _resolve_windows_shortcut(self, lnk_path):
+        """Путь к .exe, на который указывает ярлык .lnk (кэшируется), или None"""
+        cache = self._shortcut_targets
+        if lnk_path not in cache:
+            target = None
+            try:
+                si = subprocess.STARTUPINFO()
+                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+                quoted = "'" + str(lnk_path).replace("'", "''") + "'"
+                script = f"(New-Object -ComObject WScript.Shell).CreateShortcut({quoted}).TargetPath"
+                result = subprocess.run(['powershell', '-NoProfile', '-NonInteractive', '-Command', script],
+                                        capture_output=True, text=True, timeout=10, startupinfo=si,
+                                        creationflags=0x08000000)  # CREATE_NO_WINDOW
+                candidate = result.stdout.strip()
+                if candidate.lower().endswith('.exe') and os.path.isfile(candidate):
+                    target = candidate
+            except Exception as e:
+                print(f"⚠️ Не удалось определить цель ярлыка {lnk_path}: {e}")
+            cache[lnk_path] = target
+        return cache[lnk_path]
+    
+    def _launch_cursor_linux(self, cursor_exe, project_path, extra_args=()):
         """Запуск Cursor в Linux"""
         try:
             if cursor_exe in ["cursor", "code"]:
                 # Команды в PATH
-                subprocess.Popen([cursor_exe, str(project_path)],
+                proc = subprocess.Popen([cursor_exe, *extra_args, str(project_path)],
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             elif cursor_exe.endswith('.AppImage'):
                 # AppImage файлы
                 # Делаем AppImage исполняемым если нужно
                 os.chmod(cursor_exe, 0o755)
-                subprocess.Popen([cursor_exe, str(project_path)],
+                proc = subprocess.Popen([cursor_exe, *extra_args, str(project_path)],
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             elif '/snap/' in cursor_exe:
                 # Snap пакет
-                subprocess.Popen([cursor_exe, str(project_path)],
+                proc = subprocess.Popen([cursor_exe, *extra_args, str(project_path)],
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             elif '/flatpak/' in cursor_exe:
                 # Flatpak
-                subprocess.Popen(['flatpak', 'run', 'com.cursor.Cursor', str(project_path)],
+                proc = subprocess.Popen(['flatpak', 'run', 'com.cursor.Cursor', *extra_args, str(project_path)],
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             else:
                 # Обычный исполняемый файл
@@ -567,14 +707,14 @@ class CursorManager:
                     os.chmod(cursor_exe, 0o755)
                 except:
                     pass
-                subprocess.Popen([cursor_exe, str(project_path)],
+                proc = subprocess.Popen([cursor_exe, *extra_args, str(project_path)],
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
             print(f"Cursor AI запущен (Linux): {cursor_exe}")
-            return True
+            return proc
         except Exception as e:
             print(f"Ошибка запуска Cursor в Linux: {e}")
-            return False
+            return None
     
     def _is_cursor_already_running_with_project(self, project_path):
         """Проверяет, запущен ли уже Cursor с данным проектом"""
@@ -582,112 +722,54 @@ class CursorManager:
             project_name = str(project_path).split('/')[-1] if '/' in str(project_path) else str(project_path).split('\\')[-1]
             project_full_path = str(project_path)
             
-            if self.os_type == 'windows':
-                # Для Windows используем tasklist, но без появления консольных окон
-                try:
-                    si = subprocess.STARTUPINFO()
-                    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    creationflags = 0x08000000  # CREATE_NO_WINDOW
-                    result = subprocess.run(['tasklist', '/FO', 'CSV'], 
-                                          capture_output=True, text=True, timeout=5,
-                                          encoding='utf-8', errors='ignore', startupinfo=si, creationflags=creationflags)
-                    if result.returncode == 0:
-                        lines = result.stdout.split('\n')
-                        for line in lines:
-                            if 'cursor' in line.lower() or 'Cursor' in line:
-                                # Дополнительная проверка через wmic для получения командной строки
-                                try:
-                                    wmic_result = subprocess.run(['wmic', 'process', 'where', 
-                                                                f'name="Cursor.exe"', 'get', 'CommandLine'], 
-                                                               capture_output=True, text=True, timeout=3,
-                                                               encoding='utf-8', errors='ignore', startupinfo=si, creationflags=creationflags)
-                                    if project_name in wmic_result.stdout or project_full_path in wmic_result.stdout:
-                                        print(f"Найден запущенный Cursor с проектом: {project_name}")
-                                        return True
-                                except:
-                                    pass
-                except:
-                    pass
-                    
-            elif self.os_type == 'linux':
-                # Для Linux используем ps
-                result = subprocess.run(['ps', 'aux'], capture_output=True, text=True, timeout=5,
-                                       encoding='utf-8', errors='ignore')
-                if result.returncode == 0:
-                    lines = result.stdout.split('\n')
-                    
-                    cursor_processes = []
-                    for line in lines:
-                        if 'cursor' in line.lower() or 'Cursor' in line:
-                            cursor_processes.append(line)
-                    
-                    # Проверяем каждый процесс Cursor
-                    for process_line in cursor_processes:
-                        # Проверяем по имени папки или полному пути
-                        if project_name in process_line or project_full_path in process_line:
-                            print(f"Найден запущенный Cursor с проектом: {project_name}")
-                            return True
-                    
-                    # Дополнительная проверка через pgrep если доступен
-                    try:
-                        pgrep_result = subprocess.run(['pgrep', '-f', f'cursor.*{project_name}'], 
-                                                    capture_output=True, text=True, timeout=3,
-                                                    encoding='utf-8', errors='ignore')
-                        if pgrep_result.returncode == 0 and pgrep_result.stdout.strip():
-                            print(f"pgrep нашел Cursor с проектом: {project_name}")
-                            return True
-                    except:
-                        pass
-                        
-            elif self.os_type == 'darwin':  # macOS
-                # Для macOS используем ps
-                result = subprocess.run(['ps', 'aux'], capture_output=True, text=True, timeout=5,
-                                       encoding='utf-8', errors='ignore')
-                if result.returncode == 0:
-                    lines = result.stdout.split('\n')
-                    for line in lines:
-                        if 'cursor' in line.lower() or 'Cursor' in line:
-                            if project_name in line or project_full_path in line:
-                                print(f"Найден запущенный Cursor с проектом: {project_name}")
-                                return True
+            own_pid = os.getpid()
+            # Общий снимок процессов (TTL пару секунд) — без запуска ps/tasklist на каждую сборку
+            cursor_processes = get_process_table().find(
+                lambda p: p.pid != own_pid and ('cursor' in p.name.lower() or 'cursor' in p.cmdline.lower())
+            )
+            for process in cursor_processes:
+                # Проверяем по имени папки или полному пути
+                if project_name in process.cmdline or project_full_path in process.cmdline:
+                    print(f"Найден запущенный Cursor с проектом: {project_name}")
+                    return True
                     
             return False
         except Exception as e:
             print(f"Ошибка проверки процессов: {e}")
             return False
     
-    def _launch_cursor_macos(self, cursor_exe, project_path):
+    def _launch_cursor_macos(self, cursor_exe, project_path, extra_args=()):
         """Запуск Cursor в macOS"""
         try:
             if cursor_exe in ["cursor", "code"]:
                 # Команды в PATH
-                subprocess.Popen([cursor_exe, str(project_path)],
+                proc = subprocess.Popen([cursor_exe, *extra_args, str(project_path)],
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             elif '.app' in cursor_exe:
                 # macOS приложение
-                subprocess.Popen(['open', '-a', cursor_exe, str(project_path)],
+                proc = subprocess.Popen(['open', '-a', cursor_exe, str(project_path)],
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             else:
                 # Обычный исполняемый файл
-                subprocess.Popen([cursor_exe, str(project_path)],
+                proc = subprocess.Popen([cursor_exe, *extra_args, str(project_path)],
                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
             print(f"Cursor AI запущен (macOS): {cursor_exe}")
-            return True
+            return proc
         except Exception as e:
             print(f"Ошибка запуска Cursor в macOS: {e}")
-            return False
+            return None
     
-    def _launch_cursor_generic(self, cursor_exe, project_path):
+    def _launch_cursor_generic(self, cursor_exe, project_path, extra_args=()):
         """Универсальный запуск Cursor"""
         try:
-            subprocess.Popen([cursor_exe, str(project_path)],
+            proc = subprocess.Popen([cursor_exe, *extra_args, str(project_path)],
                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             print(f"Cursor AI запущен (generic): {cursor_exe}")
-            return True
+            return proc
         except Exception as e:
             print(f"Ошибка универсального запуска Cursor: {e}")
-            return False
+            return None
     
     def copy_to_clipboard(self, text, root_widget):
         """Копирует текст в буфер обмена (Tkinter/Qt/pyperclip/OS clip)."""
@@ -735,23 +817,259 @@ class CursorManager:
 
         return False
     
-    def auto_paste_prompt(self, delay_seconds=3):
+    def auto_paste_prompt(self, delay_seconds=3, project_path=None):
         """
         Автоматически вставляет промпт в Cursor AI
         
         Args:
-            delay_seconds (int): Задержка перед вставкой
+            delay_seconds (int): Задержка перед вставкой (если проект не указан)
+            project_path (Path): Проект, окно которого нужно дождаться (см. wait_until_ready)
         """
-        if PYAUTOGUI_AVAILABLE:
+        pyautogui = _get_pyautogui()
+        if pyautogui:
             try:
-                time.sleep(delay_seconds)
+                if project_path is not None:
+                    if not self.wait_until_ready(project_path, timeout=max(1, delay_seconds) * 3, fallback_delay=delay_seconds,
+                                                 open_mode=self.get_cursor_launcher().mode):
+                        print("⚠️ Окно Cursor не готово, промпт оставлен в буфере обмена")
+                        return
+                else:
+                    time.sleep(delay_seconds)
                 pyautogui.hotkey('ctrl', 'v')
             except Exception as e:
                 print(f"Ошибка автовставки: {e}")
         else:
             print("Автовставка промптов отключена из-за отсутствия pyautogui")
     
-    def create_project_structure(self, domain, desktop_path=None, theme=None, progress_callback=None, generate_images=False, cancel_check=None):
+    def wait_until_ready(self, project_path, timeout=15.0, since=None, fallback_delay=5.0,
+                         initial_interval=0.1, max_interval=1.0, settle_delay=0.5, open_mode=None):
+        """
+        Ждёт, пока Cursor откроет проект: опрос с нарастающим интервалом окна
+        (заголовок содержит имя папки проекта) или состояния рабочего пространства
+        (workspaceStorage/*/workspace.json с этой папкой, обновлённый после since)
+        
+        Args:
+            project_path (Path): Путь к проекту
+            timeout (float): Максимальное ожидание, секунды
+            since (float): Момент запуска (time.time()); по умолчанию — момент вызова
+            fallback_delay (float): Фиксированная пауза, если проверить готовность нечем
+            initial_interval (float): Первый интервал опроса
+            max_interval (float): Предельный интервал опроса
+            settle_delay (float): Пауза после готовности, чтобы окно получило фокус
+            open_mode (str): Режим открытия (cursor_launcher.OPEN_MODES); в режиме "add" папка
+                добавляется в уже открытое окно — его заголовок и workspace.json проект не называют,
+                поэтому готовностью считается любое окно Cursor (или пауза fallback_delay)
+            
+        Returns:
+            bool: True если проект открыт (или проверки окон нет и выдержана пауза fallback_delay),
+                  False по таймауту проверки окон
+        """
+        since = time.time() if since is None else since
+        project_name = Path(project_path).name
+        probes = []
+        window_probe = self._window_probe_available()
+        if open_mode == "add":
+            # Передачу папки запущенному Cursor уже дождалась очередь запуска — достаточно его окна
+            if window_probe:
+                probes.append(lambda: self._window_with_title_exists(""))
+            window_probe = False
+        else:
+            if window_probe:
+                probes.append(lambda: self._window_with_title_exists(project_name))
+            storage = self._cursor_workspace_storage()
+            if storage is not None:
+                probes.append(lambda: self._workspace_opened(storage, project_path, since))
+        if not probes:
+            time.sleep(max(0, fallback_delay))
+            return True
+        if not window_probe:
+            # Без проверки окон по имени проекта (macOS, Wayland, X11 без wmctrl/xdotool, режим "add")
+            # проверки не гарантируют срабатывания — они лишь ускоряют вставку, а по истечении
+            # fallback_delay вставляем, как и раньше, по фиксированной паузе
+            timeout = max(0, fallback_delay)
+        
+        deadline = time.monotonic() + timeout
+        interval = initial_interval
+        while True:
+            for probe in probes:
+                try:
+                    if probe():
+                        time.sleep(settle_delay)
+                        return True
+                except Exception:
+                    continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return not window_probe
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, max_interval)
+    
+    def _window_probe_available(self):
+        if self.os_type == 'windows':
+            return True
+        if self.os_type == 'linux' and os.environ.get('DISPLAY'):
+            return bool(shutil.which('wmctrl') or shutil.which('xdotool'))
+        return False
+    
+    def _window_with_title_exists(self, project_name):
+        """Есть ли видимое окно Cursor, в заголовке которого имя папки проекта"""
+        for title in self._list_window_titles():
+            if project_name in title and 'cursor' in title.lower():
+                return True
+        return False
+    
+    def _list_window_titles(self):
+        if self.os_type == 'windows':
+            import ctypes
+            from ctypes import wintypes
+            user32 = ctypes.windll.user32
+            titles = []
+            
+            @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+            def _collect(hwnd, _lparam):
+                if user32.IsWindowVisible(hwnd):
+                    length = user32.GetWindowTextLengthW(hwnd)
+                    if length:
+                        buf = ctypes.create_unicode_buffer(length + 1)
+                        user32.GetWindowTextW(hwnd, buf, length + 1)
+                        titles.append(buf.value)
+                return True
+            
+            user32.EnumWindows(_collect, 0)
+            return titles
+        if shutil.which('wmctrl'):
+            result = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True, timeout=2,
+                                    encoding='utf-8', errors='ignore')
+            # Формат: <id> <desktop> <host> <заголовок>
+            return [line.split(None, 3)[-1] for line in result.stdout.splitlines() if len(line.split(None, 3)) == 4]
+        result = subprocess.run(['xdotool', 'search', '--onlyvisible', '--name', 'Cursor', 'getwindowname', '%@'],
+                                capture_output=True, text=True, timeout=2, encoding='utf-8', errors='ignore')
+        return result.stdout.splitlines()
+    
+    def _cursor_workspace_storage(self):
+        """Каталог состояний рабочих пространств Cursor (User/workspaceStorage) или None"""
+        home = Path.home()
+        if self.os_type == 'windows':
+            base = Path(os.environ.get('APPDATA', home / 'AppData' / 'Roaming'))
+        elif self.os_type == 'darwin':
+            base = home / 'Library' / 'Application Support'
+        else:
+            base = Path(os.environ.get('XDG_CONFIG_HOME', home / '.config'))
+        storage = base / 'Cursor' / 'User' / 'workspaceStorage'
+        return storage if storage.is_dir() else None
+    
+    def _workspace_opened(self, storage, project_path, since):
+        """Есть ли состояние рабочего пространства этой папки, обновлённое после since"""
+        target = os.path.normcase(os.path.abspath(str(project_path)))
+        with os.scandir(storage) as it:
+            for entry in it:
+                try:
+                    # Cursor создаёт/обновляет каталог состояния при открытии папки
+                    if entry.stat().st_mtime < since - 1:
+                        continue
+                    with open(os.path.join(entry.path, 'workspace.json'), 'r', encoding='utf-8') as f:
+                        folder_uri = json.load(f).get('folder', '')
+                except (OSError, ValueError):
+                    continue
+                if folder_uri.startswith('file://') and os.path.normcase(self._file_uri_to_path(folder_uri)) == target:
+                    return True
+        return False
+    
+    @staticmethod
+    def _file_uri_to_path(uri):
+        from urllib.parse import unquote, urlparse
+        path = unquote(urlparse(uri).path)
+        # file:///c%3A/Users/... -> c:/Users/...
+        if len(path) > 2 and path[0] == '/' and path[2] == ':':
+            path = path[1:]
+        return os.path.abspath(path)
+    
+    def create_ideogram_generator(self, use_cache=True):
+        """
+        Создаёт IdeogramGenerator по текущим настройкам (модель, magic prompt, ключ, параллельность)
+
+        Args:
+            use_cache (bool): Подключать кэш готовых изображений (для пула вариантов — False)
+
+        Returns:
+            tuple: (IdeogramGenerator, batched) - генератор и признак пакетного режима
+        """
+        from generators.ideogram_generator import IdeogramGenerator, DEFAULT_MAX_CONCURRENCY
+        from generators.image_cache import get_image_cache
+
+        # Читаем выбранную модель из снимка общих настроек (без чтения файла)
+        try:
+            from shared.settings_manager import get_settings_manager
+            cfg = get_settings_manager().snapshot()
+            mdl = cfg.get("ideogram_model", "3.0 Turbo")
+            # Отключаем Magic Prompt по умолчанию, чтобы модель не уводила тему (корабли и т.п.)
+            mpo = cfg.get("ideogram_magic_prompt_option", "OFF")
+            # Сколько слотов генерировать одновременно
+            concurrency = cfg.get("ideogram_max_concurrency", DEFAULT_MAX_CONCURRENCY)
+            # Пакетный режим: about1-3 и gallery1-3 — по одному запросу на семейство
+            batched = bool(cfg.get("ideogram_batch_mode", False))
+            # Кэш готовых изображений по промпту/параметрам
+            cache_enabled = use_cache and cfg.get("image_cache_enabled", True)
+            cache = get_image_cache(cfg.get("image_cache_max_mb")) if cache_enabled else None
+            # API ключ
+            key = str(cfg.get("ideogram_api_key", "") or "")
+        except Exception:
+            mdl = "3.0 Turbo"
+            mpo = "OFF"
+            concurrency = DEFAULT_MAX_CONCURRENCY
+            batched = False
+            cache = None
+            key = ""
+        ideogram = IdeogramGenerator(api_key=key, silent_mode=False, model=mdl, magic_prompt_option=mpo, max_concurrency=concurrency, cache=cache)
+        return ideogram, batched
+
+    def prefetch_theme_images(self, themes, sets_per_theme=None):
+        """
+        Запускает фоновое заполнение пула наборов изображений для тематик (режим сетки)
+
+        Args:
+            themes (list): Тематики
+            sets_per_theme (int): Сколько наборов держать на тематику (по умолчанию — из настроек, 0 — выкл.)
+
+        Работает только при выключенном кэше изображений: иначе сборки берут слоты из кэша, а не из пула
+        """
+        if not is_image_generation_available():
+            return
+        try:
+            from generators.image_prefetch import get_image_prefetcher
+            from shared.settings_manager import get_settings_manager
+            cfg = get_settings_manager().snapshot()
+            if sets_per_theme is None:
+                sets_per_theme = int(cfg.get("image_prefetch_sets_per_theme", 0))
+            if sets_per_theme <= 0:
+                return
+            if cfg.get("image_cache_enabled", True):
+                # С кэшем первая сборка тематики кладёт все слоты в кэш, следующие берут их оттуда —
+                # оплаченные наборы пула никто бы не забрал
+                print("ℹ️ Предзаготовка изображений пропущена: включён кэш изображений")
+                return
+            get_image_prefetcher().request(themes, lambda: self.create_ideogram_generator(use_cache=False), sets_per_theme)
+        except Exception as e:
+            print(f"⚠️ Не удалось запустить предзаготовку изображений: {e}")
+
+    def stop_theme_prefetch(self, shutdown=False):
+        """
+        Прекращает пополнение пула (партия сетки завершена); shutdown=True — ещё и отменяет
+        строящиеся наборы (закрытие приложения). Ничего не делает, если предзаготовка не запускалась
+        """
+        module = sys.modules.get("generators.image_prefetch")
+        if module is None:
+            return
+        try:
+            if shutdown:
+                module.shutdown_image_prefetcher()
+            else:
+                module.get_image_prefetcher().release()
+        except Exception as e:
+            print(f"⚠️ Не удалось остановить предзаготовку изображений: {e}")
+
+    def create_project_structure(self, domain, desktop_path=None, theme=None, progress_callback=None, generate_images=False, cancel_check=None,
+                                 skip_slots=None, on_slot_done=None):
         """
         Создает структуру папок проекта и генерирует тематические изображения
         
@@ -761,6 +1079,8 @@ class CursorManager:
             theme (str): Тематика для генерации изображений (опционально)
             progress_callback (callable): Функция обратного вызова для обновления прогресса
             generate_images (bool): Генерировать ли изображения (по умолчанию False)
+            skip_slots (set): Слоты, уже готовые в media (возобновление партии по журналу)
+            on_slot_done (callable): on_slot_done(slot, path) — после сохранения каждого слота
             
         Returns:
             tuple: (project_path, media_path)
@@ -780,54 +1100,47 @@ class CursorManager:
         media_path.mkdir(exist_ok=True)
         
         # Генерация тематических изображений
-        if theme and IMAGE_GENERATION_AVAILABLE and generate_images:
+        if theme and generate_images and is_image_generation_available():
             try:
+                from generators.ideogram_generator import build_landing_slots, build_landing_family_prompts
+                from generators.image_prefetch import get_image_prefetcher
+
                 if progress_callback:
                     progress_callback("🎨 Запуск генерации изображений...")
                 
-                # Ideogram: промпт формируем детально для каждого типа изображения
-                # Читаем выбранную модель из настроек
-                try:
-                    from shared.settings_manager import SettingsManager
-                    sm = SettingsManager()
-                    mdl = sm.settings.get("ideogram_model", "3.0 Turbo")
-                    # Отключаем Magic Prompt по умолчанию, чтобы модель не уводила тему (корабли и т.п.)
-                    mpo = sm.settings.get("ideogram_magic_prompt_option", "OFF")
-                except Exception:
-                    mdl = "3.0 Turbo"
-                    mpo = "OFF"
-                # Читаем API ключ
-                try:
-                    key = sm.get_ideogram_api_key()
-                except Exception:
-                    key = ""
-                ideogram = IdeogramGenerator(api_key=key, silent_mode=False, model=mdl, magic_prompt_option=mpo)
-                # Стабильные сфокусированные промпты без дополнительных генераторов
-                def _p(_name: str, fallback: str) -> str:
-                    # Жёсткая анти-текст оговорка
-                    return f"{fallback}, no text, no words, no letters, no watermark, no caption"
+                ideogram, batched = self.create_ideogram_generator()
 
                 if cancel_check and cancel_check():
                     return project_path, media_path
 
-                # Основные изображения — максимально релевантные
-                ideogram.generate_single_image(_p("main", f"{theme}, professional real photo, realistic lighting"), "main", str(media_path), progress_callback)
-                ideogram.generate_single_image(_p("about1", f"{theme}, team at work, realistic"), "about1", str(media_path), progress_callback)
-                ideogram.generate_single_image(_p("about2", f"{theme}, service process, realistic"), "about2", str(media_path), progress_callback)
-                ideogram.generate_single_image(_p("about3", f"{theme}, satisfied client, realistic"), "about3", str(media_path), progress_callback)
-
-                # Галерея — фокус на реальный процесс и детали, без абстракций
-                gallery_prompts = [
-                    f"{theme}, wide angle workspace view, realistic, documentary style",
-                    f"{theme}, action shot of work in progress, realistic",
-                    f"{theme}, equipment and tools close-up, product focus, realistic",
-                ]
-                ideogram.generate_single_image(_p("gallery1", gallery_prompts[0]), "gallery1", str(media_path), progress_callback)
-                ideogram.generate_single_image(_p("gallery2", gallery_prompts[1]), "gallery2", str(media_path), progress_callback)
-                ideogram.generate_single_image(_p("gallery3", gallery_prompts[2]), "gallery3", str(media_path), progress_callback)
-
-                # Favicon — минималистичный логотип
-                ideogram.generate_single_image(_p("favicon", f"{theme} minimalist icon logo, simple, flat, high contrast"), "favicon", str(media_path), progress_callback)
+                slots = build_landing_slots(theme)
+                family_prompts = build_landing_family_prompts(theme)
+                missing = [slot for slot in slots if slot.name not in (skip_slots or ())]
+                # Сначала бесплатный кэш, и только потом пул (его наборы оплачены и пополняются за деньги)
+                if missing:
+                    cached = ideogram.take_cached_slots(missing, str(media_path), batched=batched,
+                                                        family_prompts=family_prompts, progress_callback=progress_callback)
+                    if on_slot_done:
+                        for name, path in cached.items():
+                            on_slot_done(name, path)
+                    missing = [slot for slot in missing if slot.name not in cached]
+                if not missing:
+                    if progress_callback:
+                        progress_callback("✅ Все изображения уже готовы")
+                # Готовый набор из пула предзаготовки (режим сетки) — только для пустой media
+                elif len(missing) == len(slots) and get_image_prefetcher().take_set(theme, str(media_path)):
+                    if progress_callback:
+                        progress_callback("⚡ Изображения взяты из пула предзаготовки")
+                    if on_slot_done:
+                        for f in media_path.iterdir():
+                            on_slot_done(f.stem, str(f))
+                else:
+                    # Недостающие слоты (обычно все 8: main, about1-3, gallery1-3, favicon) — параллельно
+                    ideogram.generate_slots(
+                        missing, str(media_path), progress_callback, cancel_check=cancel_check,
+                        batched=batched, family_prompts=family_prompts,
+                        on_slot_done=on_slot_done,
+                    )
 
                 # Подсчитываем успешные генерации
                 try:
@@ -847,7 +1160,7 @@ class CursorManager:
                 if progress_callback:
                     progress_callback(f"⚠️ {error_msg}")
         
-        elif theme and not IMAGE_GENERATION_AVAILABLE and generate_images:
+        elif theme and generate_images:
             if progress_callback:
                 progress_callback("⚠️ Модуль генерации изображений недоступен")
         elif theme and not generate_images:
@@ -866,7 +1179,7 @@ class CursorManager:
             prompt (str): Промпт для вставки
             root_widget: Корневой виджет Tkinter
             auto_paste (bool): Автоматически вставлять промпт
-            paste_delay (int): Задержка перед вставкой
+            paste_delay (int): Ориентировочная задержка перед вставкой (таймаут ожидания — втрое больше)
             
         Returns:
             tuple: (success, message)
@@ -875,15 +1188,20 @@ class CursorManager:
         self.copy_to_clipboard(prompt, root_widget)
         
         # Пытаемся открыть Cursor
+        launched_at = time.time()
         if self.open_cursor_with_project(project_path):
             if auto_paste:
-                # Автоматическая вставка: ждём окно и жмём Ctrl+V
+                # Автоматическая вставка: ждём готовности окна проекта (не дольше 3×paste_delay) и жмём Ctrl+V
                 try:
-                    time.sleep(max(1, paste_delay))
-                    if PYAUTOGUI_AVAILABLE:
+                    pyautogui = _get_pyautogui()
+                    if not pyautogui:
+                        print("⚠️ pyautogui недоступен, автовставка невозможна")
+                    elif self.wait_until_ready(project_path, timeout=max(1, paste_delay) * 3,
+                                               since=launched_at, fallback_delay=max(1, paste_delay),
+                                               open_mode=self.get_cursor_launcher().mode):
                         pyautogui.hotkey('ctrl', 'v')
                     else:
-                        print("⚠️ pyautogui недоступен, автовставка невозможна")
+                        print("⚠️ Окно Cursor не дождались, промпт оставлен в буфере обмена")
                 except Exception as e:
                     print(f"Ошибка автовставки: {e}")
             
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+Ограниченный поиск файлов по файловой системе (os.scandir)
+Каталоги отсекаются до спуска в них (глубина, шаблоны игнорирования),
+корни обходятся параллельно, общий бюджет по времени и числу записей
+"""
+
+import fnmatch
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Sequence
+
+# Каталоги, в которых исполняемого файла приложения заведомо нет, а файлов — миллионы
+DEFAULT_IGNORE_PATTERNS = (
+    "node_modules", ".git", ".hg", ".svn", ".cache", "__pycache__", ".npm", ".yarn",
+    ".pnpm-store", ".venv", "venv", ".tox", ".cargo", ".rustup", ".gradle", ".m2",
+    "site-packages", ".Trash", ".local/share/Trash", "Cache", "CachedData", "*.tmp",
+)
+
+
+def _env_patterns() -> List[str]:
+    raw = os.environ.get("LANDGEN_SCAN_IGNORE", "")
+    return [p.strip() for p in raw.split(",") if p.strip()]
+
+
+class FsScanner:
+    """Параллельный обход нескольких корней с отсечением каталогов и общим бюджетом"""
+
+    def __init__(
+        self,
+        ignore_patterns: Optional[Sequence[str]] = None,
+        max_depth: int = 3,
+        time_budget: Optional[float] = None,
+        entry_budget: Optional[int] = None,
+        max_workers: int = 4,
+    ):
+        """
+        Args:
+            ignore_patterns: Шаблоны fnmatch для имён каталогов (или хвостов пути через "/"),
+                которые не обходятся; по умолчанию DEFAULT_IGNORE_PATTERNS + LANDGEN_SCAN_IGNORE
+            max_depth: Максимальная глубина спуска относительно корня
+            time_budget: Общий лимит времени на поиск, секунды (LANDGEN_SCAN_TIME_BUDGET, по умолчанию 5)
+            entry_budget: Общий лимит просмотренных записей (LANDGEN_SCAN_ENTRY_BUDGET, по умолчанию 200000)
+            max_workers: Сколько корней обходится одновременно
+        """
+        patterns = list(DEFAULT_IGNORE_PATTERNS if ignore_patterns is None else ignore_patterns)
+        patterns += _env_patterns()
+        self._name_patterns = [p for p in patterns if "/" not in p]
+        self._path_patterns = [p for p in patterns if "/" in p]
+        self.max_depth = max(0, int(max_depth))
+        if time_budget is None:
+            time_budget = float(os.environ.get("LANDGEN_SCAN_TIME_BUDGET", 5.0))
+        if entry_budget is None:
+            entry_budget = int(os.environ.get("LANDGEN_SCAN_ENTRY_BUDGET", 200_000))
+        self.time_budget = time_budget
+        self.entry_budget = entry_budget
+        self.max_workers = max(1, int(max_workers))
+        # Статистика последнего поиска
+        self.entries_seen = 0
+        self.budget_exhausted = False
+
+    def is_ignored(self, name: str, path: str) -> bool:
+        if any(fnmatch.fnmatch(name, p) for p in self._name_patterns):
+            return True
+        normalized = path.replace(os.sep, "/")
+        return any(fnmatch.fnmatch(normalized, "*/" + p) for p in self._path_patterns)
+
+    def find_first(
+        self,
+        roots: Iterable[str],
+        match: Callable[[str], bool],
+        accept: Optional[Callable[[str], bool]] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> Optional[str]:
+        """
+        Ищет первый файл, имя которого подходит под match(name), а полный путь — под accept(path)
+
+        Args:
+            roots: Корни обхода (несуществующие пропускаются)
+            match: Быстрая проверка имени файла
+            accept: Дорогая проверка кандидата (например, пробный запуск); по умолчанию — принять
+            stop_event: Внешняя отмена поиска
+
+        Returns:
+            str: Путь к найденному файлу или None (не найдено/исчерпан бюджет/отмена)
+        """
+        roots = list(dict.fromkeys(r for r in roots if r and os.path.isdir(r)))
+        if not roots:
+            return None
+        self.entries_seen = 0
+        self.budget_exhausted = False
+        deadline = time.monotonic() + self.time_budget
+        done = threading.Event()
+        lock = threading.Lock()
+        visited = set()
+        result: List[str] = []
+
+        def _should_stop() -> bool:
+            if done.is_set() or (stop_event is not None and stop_event.is_set()):
+                return True
+            if time.monotonic() > deadline or self.entries_seen > self.entry_budget:
+                self.budget_exhausted = True
+                done.set()
+                return True
+            return False
+
+        def _walk(root: str):
+            stack = [(root, 0)]
+            while stack and not _should_stop():
+                directory, depth = stack.pop()
+                key = os.path.normcase(os.path.abspath(directory))
+                with lock:
+                    # Корни пересекаются (например, ~ и ~/Downloads) — каталог обходим один раз
+                    if key in visited:
+                        continue
+                    visited.add(key)
+                try:
+                    with os.scandir(directory) as it:
+                        entries = list(it)
+                except OSError:
+                    continue
+                with lock:
+                    self.entries_seen += len(entries)
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if depth < self.max_depth and not self.is_ignored(entry.name, entry.path):
+                                stack.append((entry.path, depth + 1))
+                        elif match(entry.name) and (accept is None or accept(entry.path)):
+                            with lock:
+                                if not result:
+                                    result.append(entry.path)
+                            done.set()
+                            return
+                    except OSError:
+                        continue
+                    if done.is_set():
+                        return
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(roots)), thread_name_prefix="fs-scan") as pool:
+            list(pool.map(_walk, roots))
+        return result[0] if result else None
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""
+Журнал партии сборок (append-only JSONL в папке партии)
+Фиксирует параметры задач, готовые изображения по слотам и завершение задач,
+чтобы после падения/закрытия приложения продолжить партию с места остановки
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Set
+
+from core.build_pipeline import resolve_project_folder
+
+JOURNAL_NAME = ".batch_journal.jsonl"
+
+# Параметры задачи, которые имеет смысл сохранять (остальное — рантайм: cancel_event, journal...)
+PERSISTED_PARAMS = (
+    "save_path", "country", "theme", "domain", "folder_name", "city",
+    "custom_prompt", "no_images", "language", "auto_paste", "origin",
+)
+
+
+class JobJournal:
+    """Журнал одной папки партии. Запись — по строке на событие, с fsync"""
+
+    def __init__(self, batch_dir):
+        self.batch_dir = Path(batch_dir)
+        self.path = self.batch_dir / JOURNAL_NAME
+        self._lock = threading.Lock()
+        # key (папка проекта) -> {"params": dict, "images": {slot: file}, "status": str|None ("done"/"abandoned")}
+        self._jobs: Dict[str, dict] = {}
+        # Хвост файла без перевода строки (обрыв записи) — следующую запись начинаем с новой строки
+        self._torn_tail = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        self._torn_tail = bool(lines) and not lines[-1].endswith("\n")
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Недописанная строка при аварийном завершении — пропускаем
+                continue
+            self._apply(record)
+
+    def _apply(self, record):
+        key = record.get("key")
+        if not key:
+            return
+        event = record.get("event")
+        if event == "job":
+            prev = self._jobs.get(key)
+            params = record.get("params") or {}
+            # Готовые изображения переживают повторную постановку, если тематика та же
+            images = prev["images"] if prev and prev["params"].get("theme") == params.get("theme") else {}
+            self._jobs[key] = {"params": params, "images": images, "status": None}
+        elif key in self._jobs:
+            if event == "image":
+                self._jobs[key]["images"][record.get("slot")] = record.get("file")
+            elif event == "done":
+                self._jobs[key]["status"] = record.get("status") or "done"
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._apply(record)
+            try:
+                self.batch_dir.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    if self._torn_tail:
+                        line = "\n" + line
+                        self._torn_tail = False
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                print(f"⚠️ Журнал партии: не удалось записать {self.path}: {e}")
+
+    @staticmethod
+    def job_key(params) -> str:
+        return resolve_project_folder(params)
+
+    def record_job(self, params):
+        """Регистрирует задачу при постановке в очередь"""
+        persisted = {k: params[k] for k in PERSISTED_PARAMS if k in params}
+        # Имя папки фиксируем окончательно: при возобновлении id задач будут другими
+        persisted["folder_name"] = self.job_key(params)
+        self._append({"event": "job", "key": self.job_key(params), "params": persisted})
+
+    def record_image(self, key: str, slot: str, file_path: str):
+        self._append({"event": "image", "key": key, "slot": slot, "file": Path(file_path).name})
+
+    def record_done(self, key: str, status: str = "done"):
+        """Закрывает задачу: status "done" — собрана полностью, "abandoned" — возобновление отклонено"""
+        self._append({"event": "done", "key": key, "status": status})
+
+    def abandon_pending(self) -> int:
+        """Помечает все незавершённые задачи брошенными, чтобы партия больше не предлагалась к продолжению"""
+        with self._lock:
+            keys = [key for key, job in self._jobs.items() if not job["status"]]
+        for key in keys:
+            self.record_done(key, status="abandoned")
+        return len(keys)
+
+    def is_done(self, key: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(key)
+            return bool(job and job["status"])
+
+    def completed_slots(self, key: str, media_dir) -> Set[str]:
+        """Слоты, отмеченные в журнале и реально лежащие в media_dir (непустые файлы)"""
+        with self._lock:
+            job = self._jobs.get(key)
+            images = dict(job["images"]) if job else {}
+        done = set()
+        for slot, name in images.items():
+            try:
+                if name and (Path(media_dir) / name).stat().st_size > 0:
+                    done.add(slot)
+            except OSError:
+                continue
+        return done
+
+    def pending_jobs(self) -> List[dict]:
+        """Параметры незавершённых задач (для повторной постановки в очередь)"""
+        with self._lock:
+            pending = []
+            for key, job in self._jobs.items():
+                if job["status"]:
+                    continue
+                params = dict(job["params"])
+                params["folder_name"] = key
+                params["needs_index"] = False
+                pending.append(params)
+            return pending
+
+
+def find_unfinished_journals(root, max_depth: int = 1) -> List[JobJournal]:
+    """
+    Ищет журналы партий с незавершёнными задачами в root и его подпапках
+
+    Args:
+        root (str|Path): Папка сохранения
+        max_depth (int): Глубина поиска (папки партий лежат сразу в папке сохранения)
+    """
+    found: List[JobJournal] = []
+    root = Path(root)
+
+    def _scan(directory: Path, depth: int):
+        if (directory / JOURNAL_NAME).is_file():
+            journal = JobJournal(directory)
+            if journal.pending_jobs():
+                found.append(journal)
+        if depth >= max_depth:
+            return
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."):
+                        _scan(Path(entry.path), depth + 1)
+        except OSError:
+            pass
+
+    if root.is_dir():
+        _scan(root, 0)
+    return found
+
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+Планировщик задач сборки лендингов
+Фиксированный пул потоков + очередь (deque) + учёт активных задач по id
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+
+class JobScheduler:
+    """Очередь задач с ограничением параллельности (без зависимости от Qt)"""
+
+    def __init__(self, max_workers=10, on_started=None, on_finished=None, thread_name_prefix="build"):
+        """
+        Args:
+            max_workers (int): Сколько задач выполняется одновременно
+            on_started (callable): on_started(job_id, params) — вызывается в рабочем потоке
+            on_finished (callable): on_finished(job_id, params) — вызывается в рабочем потоке
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.on_started = on_started
+        self.on_finished = on_finished
+        self._thread_name_prefix = thread_name_prefix
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._queue: Deque[Tuple[int, dict, Callable[[dict], None]]] = deque()
+        self._active: Dict[int, dict] = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=thread_name_prefix)
+        self._executor_size = self.max_workers
+        self._closed = False
+
+    def submit(self, params, fn):
+        """
+        Ставит задачу в очередь. Идентификатор берётся из params["id"].
+
+        Args:
+            params (dict): Параметры задачи (должен содержать "id")
+            fn (callable): fn(params) — выполняется в пуле
+
+        Returns:
+            int: Идентификатор задачи
+        """
+        job_id = int(params["id"])
+        with self._lock:
+            if self._closed:
+                # Планировщик остановлен (закрытие приложения) — новые задачи не принимаются
+                return job_id
+            self._queue.append((job_id, params, fn))
+        self._pump()
+        return job_id
+
+    def set_max_workers(self, max_workers):
+        """Меняет лимит параллельных задач (применяется к следующим запускам)"""
+        with self._lock:
+            self.max_workers = max(1, int(max_workers))
+            if self.max_workers > self._executor_size:
+                # Пул не умеет расти — новые задачи пойдут в новый пул, старый доработает своё
+                old = self._executor
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self._thread_name_prefix)
+                self._executor_size = self.max_workers
+                old.shutdown(wait=False)
+        self._pump()
+
+    def _pump(self):
+        with self._lock:
+            while self._queue and len(self._active) < self.max_workers and not self._closed:
+                job_id, params, fn = self._queue.popleft()
+                self._active[job_id] = params
+                self._executor.submit(self._run, job_id, params, fn)
+
+    def _run(self, job_id, params, fn):
+        try:
+            self._notify(self.on_started, job_id, params)
+            fn(params)
+        except Exception as e:
+            print(f"⚠️ Ошибка задачи {job_id}: {e}")
+        finally:
+            with self._lock:
+                self._active.pop(job_id, None)
+                if not self._active and not self._queue:
+                    self._idle.notify_all()
+            self._notify(self.on_finished, job_id, params)
+            self._pump()
+
+    @staticmethod
+    def _notify(cb, job_id, params):
+        if cb:
+            try:
+                cb(job_id, params)
+            except Exception:
+                pass
+
+    def active_jobs(self) -> List[dict]:
+        with self._lock:
+            return list(self._active.values())
+
+    def queued_jobs(self) -> List[dict]:
+        with self._lock:
+            return [params for _, params, _ in self._queue]
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._active) + len(self._queue)
+
+    def cancel_all(self):
+        """Помечает отменёнными все активные и ожидающие задачи (через params["cancel_event"])"""
+        for params in self.active_jobs() + self.queued_jobs():
+            ce = params.get("cancel_event")
+            if ce:
+                try:
+                    ce.set()
+                except Exception:
+                    pass
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Ждёт опустошения очереди. Возвращает True, если все задачи завершены"""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._active and not self._queue, timeout=timeout)
+
+    def shutdown(self, wait=True):
+        """
+        Останавливает планировщик
+
+        При wait=False (закрытие приложения) ожидающие задачи снимаются с очереди,
+        активным выставляется отмена (params["cancel_event"]) и новые запуски не начинаются
+        """
+        if not wait:
+            self.cancel_all()
+            with self._lock:
+                self._closed = True
+                self._queue.clear()
+                if not self._active:
+                    self._idle.notify_all()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            return
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""
+Снимок таблицы процессов с коротким TTL (общий для всех сборок)
+Linux — чтение /proc/*/cmdline без запуска внешних команд,
+macOS — один вызов ps, Windows — один вызов wmic
+"""
+
+import os
+import platform
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+
+@dataclass(frozen=True)
+class ProcessInfo:
+    pid: int
+    name: str
+    cmdline: str
+
+
+class ProcessTable:
+    """Кэширует список процессов на ttl секунд; обновление выполняет один поток, остальные ждут"""
+
+    def __init__(self, ttl: float = 2.0):
+        self.ttl = ttl
+        self.os_type = platform.system().lower()
+        self._lock = threading.Lock()
+        self._snapshot: List[ProcessInfo] = []
+        self._taken_at: Optional[float] = None
+
+    def snapshot(self) -> List[ProcessInfo]:
+        with self._lock:
+            now = time.monotonic()
+            if self._taken_at is None or now - self._taken_at > self.ttl:
+                self._snapshot = self._read()
+                self._taken_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self):
+        """Сбрасывает снимок (например, после запуска нового процесса)"""
+        with self._lock:
+            self._taken_at = None
+
+    def find(self, predicate: Callable[[ProcessInfo], bool]) -> List[ProcessInfo]:
+        return [p for p in self.snapshot() if predicate(p)]
+
+    def _read(self) -> List[ProcessInfo]:
+        try:
+            if self.os_type == 'linux' and os.path.isdir('/proc'):
+                return self._read_proc()
+            if self.os_type == 'windows':
+                return self._read_wmic()
+            return self._read_ps()
+        except Exception as e:
+            print(f"Ошибка чтения списка процессов: {e}")
+            return []
+
+    @staticmethod
+    def _read_proc() -> List[ProcessInfo]:
+        processes = []
+        with os.scandir('/proc') as it:
+            for entry in it:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    with open(f"/proc/{entry.name}/cmdline", "rb") as f:
+                        raw = f.read()
+                    with open(f"/proc/{entry.name}/comm", "rb") as f:
+                        name = f.read().decode("utf-8", "ignore").strip()
+                except OSError:
+                    # Процесс завершился между листингом и чтением или нет доступа
+                    continue
+                cmdline = raw.replace(b"\0", b" ").decode("utf-8", "ignore").strip()
+                processes.append(ProcessInfo(int(entry.name), name, cmdline))
+        return processes
+
+    @staticmethod
+    def _read_ps() -> List[ProcessInfo]:
+        result = subprocess.run(['ps', '-axo', 'pid=,comm=,args='], capture_output=True, text=True, timeout=5,
+                                encoding='utf-8', errors='ignore')
+        processes = []
+        for line in result.stdout.splitlines():
+            parts = line.split(None, 2)
+            if len(parts) >= 2 and parts[0].isdigit():
+                processes.append(ProcessInfo(int(parts[0]), os.path.basename(parts[1]), parts[2] if len(parts) > 2 else parts[1]))
+        return processes
+
+    @staticmethod
+    def _read_wmic() -> List[ProcessInfo]:
+        # Без появления консольных окон
+        si = subprocess.STARTUPINFO()
+        si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        creationflags = 0x08000000  # CREATE_NO_WINDOW
+        result = subprocess.run(['wmic', 'process', 'get', 'CommandLine,Name,ProcessId', '/FORMAT:CSV'],
+                                capture_output=True, text=True, timeout=5,
+                                encoding='utf-8', errors='ignore', startupinfo=si, creationflags=creationflags)
+        processes = []
+        for line in result.stdout.splitlines():
+            # Node,CommandLine,Name,ProcessId — в командной строке могут быть запятые
+            parts = line.strip().split(',')
+            if len(parts) < 4 or not parts[-1].isdigit():
+                continue
+            processes.append(ProcessInfo(int(parts[-1]), parts[-2], ','.join(parts[1:-2])))
+        return processes
+
+
+_table: Optional[ProcessTable] = None
+_table_lock = threading.Lock()
+
+
+def get_process_table() -> ProcessTable:
+    """Возвращает общий для процесса снимок таблицы процессов"""
+    global _table
+    with _table_lock:
+        if _table is None:
+            _table = ProcessTable()
+        return _table
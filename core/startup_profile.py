@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Профилирование запуска приложения (аналог python -X importtime, работает и в собранном EXE)
+Включается флагом --startup-report или переменной окружения LANDGEN_STARTUP_REPORT=1
+"""
+
+import builtins
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+_T0 = time.perf_counter()
+
+
+class ImportTimer:
+    """Перехватывает __import__ и считает собственное и накопленное время загрузки модулей"""
+
+    def __init__(self):
+        self._original = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # имя модуля -> (собственное время, накопленное время), секунды
+        self.imports: Dict[str, Tuple[float, float]] = {}
+        self.marks: List[Tuple[str, float]] = []
+
+    def install(self):
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Уже загруженные модули не интересны — сразу отдаём оригинальному __import__
+        if level or name in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self.imports.setdefault(name, (elapsed - children, elapsed))
+
+    def mark(self, label: str):
+        """Отметка этапа запуска (время от старта процесса)"""
+        self.marks.append((label, time.perf_counter() - _T0))
+
+    def report(self, top: int = 20) -> str:
+        lines = ["⏱️ Профиль запуска:"]
+        for label, at in self.marks:
+            lines.append(f"  {at * 1000:8.1f} ms  {label}")
+        lines.append(f"  Самые долгие импорты (из {len(self.imports)}), мс: собственное | накопленное")
+        ranked = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        for name, (own, cumulative) in ranked:
+            lines.append(f"  {own * 1000:8.1f} | {cumulative * 1000:8.1f}  {name}")
+        return "\n".join(lines)
+
+
+_timer: Optional[ImportTimer] = None
+
+
+def enable_if_requested(argv=None) -> bool:
+    """Включает профилирование, если передан --startup-report или задан LANDGEN_STARTUP_REPORT"""
+    global _timer
+    argv = sys.argv if argv is None else argv
+    if "--startup-report" not in argv and not os.environ.get("LANDGEN_STARTUP_REPORT"):
+        return False
+    if _timer is None:
+        _timer = ImportTimer()
+        _timer.install()
+        _timer.mark("старт профилирования")
+    return True
+
+
+def mark(label: str):
+    if _timer is not None:
+        _timer.mark(label)
+
+
+def finish(label: str = "окно показано"):
+    """Фиксирует последний этап, печатает отчёт и снимает перехват импортов"""
+    global _timer
+    if _timer is None:
+        return
+    _timer.mark(label)
+    _timer.uninstall()
+    print(_timer.report())
+    _timer = None
@@ -4,12 +4,17 @@ from dataclasses import dataclass
 from typing import Optional, Tuple
 from core.version import VERSION as LOCAL_VERSION
 
-import requests
 
 GITHUB_API_BRANCH = "https://api.github.com/repos/igorao79/prompthelper/branches/linux"
 GITHUB_ZIP_URL = "https://github.com/igorao79/prompthelper/archive/refs/heads/linux.zip"
 
 
+def _http_get(url: str, timeout: int = 10):
+    # requests импортируется при первой проверке, а не при старте приложения
+    import requests
+    return requests.get(url, timeout=timeout)
+
+
 @dataclass
 class UpdateInfo:
     available: bool
@@ -38,7 +43,7 @@ class UpdateChecker:
                 return UpdateInfo(True, rel_ver, GITHUB_ZIP_URL, binary_url, rel_ver)
 
             # Фоллбек на проверку ветки (для дев/ручных тестов)
-            resp = requests.get(GITHUB_API_BRANCH, timeout=10)
+            resp = _http_get(GITHUB_API_BRANCH)
             if resp.status_code != 200:
                 return UpdateInfo(False, self.settings.get_last_update_sha(), message=f"HTTP {resp.status_code}")
             data = resp.json()
@@ -55,7 +60,7 @@ class UpdateChecker:
     def check_force(self) -> UpdateInfo:
         """То же что check(), но игнорирует настройку auto_check_updates."""
         try:
-            resp = requests.get(GITHUB_API_BRANCH, timeout=10)
+            resp = _http_get(GITHUB_API_BRANCH)
             if resp.status_code != 200:
                 return UpdateInfo(False, self.settings.get_last_update_sha(), message=f"HTTP {resp.status_code}")
 
@@ -81,7 +86,7 @@ class UpdateChecker:
     def _get_latest_release_binary_url(self) -> Tuple[Optional[str], Optional[str]]:
         try:
             releases_api = "https://api.github.com/repos/igorao79/prompthelper/releases/latest"
-            r = requests.get(releases_api, timeout=10)
+            r = _http_get(releases_api)
             if r.status_code != 200:
                 return None, None
             data = r.json()
@@ -4,22 +4,187 @@
 - 8 изображений: выполняет 2 запроса по 4 изображения
 - Промпт передается БЕЗ каких-либо модификаций (то, что ввел пользователь)
 - Сохранение и сжатие изображений: JPG (основные), PNG (favicon)
+- Набор слотов лендинга генерируется параллельно (ограничение — max_concurrency)
+- Все генераторы процесса используют общий пул HTTP-соединений (keep-alive)
+- Декодирование/ресайз/сжатие слотов выполняются в пуле процессов (image_postprocess)
+- Готовые слоты кэшируются по (промпт, модель, magic prompt, слот) — см. image_cache
+- Запросы к API идут через общий адаптивный ограничитель с повторами на 429/503 (500/502/504 — по IDEOGRAM_RETRY_5XX) (rate_limiter);
+  сетевые ошибки повторяются, только если запрос не был отправлен (иначе возможна двойная оплата)
 """
 
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
-from typing import Callable, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 from PIL import Image
 
+from generators.image_cache import ImageCache
+from generators.image_postprocess import encode_jpeg_under_size, encode_png, postprocess_slot_image
+from generators.rate_limiter import compute_backoff, get_rate_limiter, parse_retry_after
+
+
+# Сколько слотов одного лендинга генерировать одновременно (по умолчанию)
+DEFAULT_MAX_CONCURRENCY = 4
+
+IDEOGRAM_API_ORIGIN = "https://api.ideogram.ai/"
+
+# Размеры пулов соединений по хостам (переопределяются через ENV или configure_http_pool)
+DEFAULT_API_POOL_MAXSIZE = 16
+DEFAULT_CDN_POOL_MAXSIZE = 32
+
+# Ответы API, после которых платный запрос генерации повторяется с бэкоффом:
+# 429 и 503 — запрос отклонён до генерации. 500/502/504 могли прийти уже после
+# генерации (ответ потерян на шлюзе) — их повтор включается явно (IDEOGRAM_RETRY_5XX=1)
+RETRYABLE_STATUSES = (429, 503)
+RETRYABLE_5XX_STATUSES = (500, 502, 504)
+DEFAULT_MAX_RETRIES = 4
+
+# Потоковая загрузка изображений: лимит размера и размер чанка
+DEFAULT_MAX_DOWNLOAD_MB = 20
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, str(default))))
+    except Exception:
+        return default
+
+
+def _write_file_atomic(path, data: bytes) -> None:
+    """Пишет файл через временный + os.replace: существующий файл (и его жёсткие ссылки) не перезаписывается на месте"""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def _looks_like_image(head: bytes) -> bool:
+    """Проверяет сигнатуру (magic bytes): JPEG, PNG, WebP или GIF."""
+    return (
+        head[:3] == b"\xff\xd8\xff"
+        or head[:8] == b"\x89PNG\r\n\x1a\n"
+        or (head[:4] == b"RIFF" and head[8:12] == b"WEBP")
+        or head[:6] in (b"GIF87a", b"GIF89a")
+    )
+
+
+def _request_not_sent(error: Exception) -> bool:
+    """
+    True, если запрос точно не дошёл до сервера (не удалось установить соединение).
+    Повторять платный POST можно только в этом случае: после отправки (ReadTimeout,
+    обрыв при чтении ответа) изображение могло быть уже сгенерировано и оплачено.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError):
+        return False
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)  # MaxRetryError -> исходная ошибка urllib3
+    return isinstance(reason, NewConnectionError)
+
+
+def _build_http_session(api_maxsize: int, cdn_maxsize: int) -> requests.Session:
+    session = requests.Session()
+    # API Ideogram — отдельный пул, чтобы загрузки с CDN не вытесняли его соединения
+    session.mount(IDEOGRAM_API_ORIGIN, HTTPAdapter(pool_connections=1, pool_maxsize=api_maxsize))
+    # Остальные хосты (CDN изображений) — общий пул
+    cdn_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=cdn_maxsize)
+    session.mount("https://", cdn_adapter)
+    session.mount("http://", cdn_adapter)
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """Возвращает общую для процесса HTTP-сессию (keep-alive, пул соединений по хостам)."""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                _http_session = _build_http_session(
+                    _env_int("IDEOGRAM_API_POOL_MAXSIZE", DEFAULT_API_POOL_MAXSIZE),
+                    _env_int("IDEOGRAM_CDN_POOL_MAXSIZE", DEFAULT_CDN_POOL_MAXSIZE),
+                )
+    return _http_session
+
+
+def configure_http_pool(api_maxsize: Optional[int] = None, cdn_maxsize: Optional[int] = None) -> None:
+    """
+    Пересоздаёт общую сессию с новыми лимитами соединений на хост.
+    Уже выполняющиеся запросы дорабатывают на старой сессии.
+    """
+    global _http_session
+    with _http_session_lock:
+        _http_session = _build_http_session(
+            max(1, int(api_maxsize or _env_int("IDEOGRAM_API_POOL_MAXSIZE", DEFAULT_API_POOL_MAXSIZE))),
+            max(1, int(cdn_maxsize or _env_int("IDEOGRAM_CDN_POOL_MAXSIZE", DEFAULT_CDN_POOL_MAXSIZE))),
+        )
+
+
+@dataclass(frozen=True)
+class ImageSlot:
+    """Слот изображения лендинга: имя файла (без расширения), промпт и семейство для пакетного режима."""
+    name: str
+    prompt: str
+    family: Optional[str] = None
+
+
+def _no_text(prompt: str) -> str:
+    # Жёсткая анти-текст оговорка
+    return f"{prompt}, no text, no words, no letters, no watermark, no caption"
+
+
+def build_landing_slots(theme: str) -> List[ImageSlot]:
+    """
+    Возвращает 8 слотов лендинга (main, about1-3, gallery1-3, favicon) для тематики.
+    Промпты стабильные и сфокусированные, с жёсткой анти-текст оговоркой.
+    """
+    return [
+        # Основные изображения — максимально релевантные
+        ImageSlot("main", _no_text(f"{theme}, professional real photo, realistic lighting")),
+        ImageSlot("about1", _no_text(f"{theme}, team at work, realistic"), "about"),
+        ImageSlot("about2", _no_text(f"{theme}, service process, realistic"), "about"),
+        ImageSlot("about3", _no_text(f"{theme}, satisfied client, realistic"), "about"),
+        # Галерея — фокус на реальный процесс и детали, без абстракций
+        ImageSlot("gallery1", _no_text(f"{theme}, wide angle workspace view, realistic, documentary style"), "gallery"),
+        ImageSlot("gallery2", _no_text(f"{theme}, action shot of work in progress, realistic"), "gallery"),
+        ImageSlot("gallery3", _no_text(f"{theme}, equipment and tools close-up, product focus, realistic"), "gallery"),
+        # Favicon — минималистичный логотип
+        ImageSlot("favicon", _no_text(f"{theme} minimalist icon logo, simple, flat, high contrast")),
+    ]
+
+
+def build_landing_family_prompts(theme: str) -> Dict[str, str]:
+    """Общие промпты семейств слотов для пакетного режима (один запрос на семейство)."""
+    return {
+        "about": _no_text(f"{theme}, team at work, service process and satisfied clients, realistic"),
+        "gallery": _no_text(f"{theme}, workspace, work in progress and equipment details, realistic, documentary style"),
+    }
+
 
 class IdeogramGenerator:
     """Генератор изображений на базе Ideogram 2.0 Turbo."""
 
-    def __init__(self, api_key: Optional[str] = None, silent_mode: bool = False, model: Optional[str] = None, magic_prompt_option: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, silent_mode: bool = False, model: Optional[str] = None, magic_prompt_option: Optional[str] = None, max_concurrency: Optional[int] = None, cache: Optional[ImageCache] = None):
         # Приоритет: явный ключ -> ENV; если ключ отсутствует — не генерируем изображения
         self.api_key = api_key or os.getenv("IDEOGRAM_API_KEY") or ""
         self.api_url = "https://api.ideogram.ai/v1/ideogram-v3/generate"
@@ -38,6 +203,23 @@ class IdeogramGenerator:
             self.num_images_per_request = 4
         # Отладка биллинга/запросов
         self.debug_billing = str(os.getenv("IDEOGRAM_DEBUG_BILLING", "0")).lower() in ("1", "true", "yes")
+        # Повторы запросов к API при 429/503 и сетевых ошибках
+        try:
+            self.max_retries = max(0, int(os.getenv("IDEOGRAM_MAX_RETRIES", str(DEFAULT_MAX_RETRIES))))
+        except Exception:
+            self.max_retries = DEFAULT_MAX_RETRIES
+        self.retryable_statuses = RETRYABLE_STATUSES
+        if str(os.getenv("IDEOGRAM_RETRY_5XX", "0")).lower() in ("1", "true", "yes"):
+            self.retryable_statuses = RETRYABLE_STATUSES + RETRYABLE_5XX_STATUSES
+        # Кэш готовых изображений (None — без кэша)
+        self.cache = cache
+        # Максимальный размер скачиваемого изображения (защита от мусорных/огромных ответов)
+        self.max_download_bytes = _env_int("IDEOGRAM_MAX_DOWNLOAD_MB", DEFAULT_MAX_DOWNLOAD_MB) * 1024 * 1024
+        # Параллельность генерации слотов: явное значение -> ENV -> по умолчанию
+        try:
+            self.max_concurrency = max(1, int(max_concurrency or os.getenv("IDEOGRAM_MAX_CONCURRENCY") or DEFAULT_MAX_CONCURRENCY))
+        except Exception:
+            self.max_concurrency = DEFAULT_MAX_CONCURRENCY
 
     def generate_eight_images(
         self,
@@ -161,45 +343,238 @@ class IdeogramGenerator:
 
         return saved
 
+    def generate_slots(
+        self,
+        slots: List[ImageSlot],
+        media_dir: str,
+        progress_callback: Optional[Callable[[str], None]] = None,
+        cancel_check: Optional[Callable[[], bool]] = None,
+        max_concurrency: Optional[int] = None,
+        batched: bool = False,
+        family_prompts: Optional[Dict[str, str]] = None,
+        on_slot_done: Optional[Callable[[str, str], None]] = None,
+    ) -> Dict[str, Optional[str]]:
+        """
+        Генерирует набор слотов параллельно (не более max_concurrency одновременно).
+        Отмена (cancel_check) проверяется перед запуском каждого слота и внутри него.
+
+        В пакетном режиме (batched=True) слоты одного семейства (slot.family) запрашиваются
+        одним запросом с num_images>1 по промпту семейства (family_prompts), ссылки
+        раскладываются по слотам в порядке их следования; при частичной неудаче
+        недостающие слоты догенерируются по одному со своим промптом.
+
+        on_slot_done(name, path) вызывается для каждого сохранённого слота (журнал партии).
+
+        Returns:
+            dict: имя слота -> путь к сохранённому файлу (None при ошибке/отмене)
+        """
+        results: Dict[str, Optional[str]] = {slot.name: None for slot in slots}
+        if not slots:
+            return results
+        units = self._group_slots(slots) if batched else [[slot] for slot in slots]
+        try:
+            workers = max(1, min(len(units), int(max_concurrency or self.max_concurrency)))
+        except Exception:
+            workers = 1
+
+        def _run(unit: List[ImageSlot]) -> Dict[str, Optional[str]]:
+            if self._is_cancelled(cancel_check):
+                return {slot.name: None for slot in unit}
+            if len(unit) == 1:
+                slot = unit[0]
+                return {slot.name: self.generate_single_image(slot.prompt, slot.name, media_dir, progress_callback, cancel_check=cancel_check)}
+            family_prompt = (family_prompts or {}).get(unit[0].family or "") or unit[0].prompt
+            return self._generate_family(unit, family_prompt, media_dir, progress_callback, cancel_check)
+
+        total = len(slots)
+        done = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ideogram") as pool:
+            futures = {pool.submit(_run, unit): unit for unit in units}
+            for fut in as_completed(futures):
+                unit = futures[fut]
+                done += len(unit)
+                try:
+                    unit_results = fut.result()
+                    results.update(unit_results)
+                    if on_slot_done:
+                        for name, path in unit_results.items():
+                            if path:
+                                on_slot_done(name, path)
+                except Exception as e:
+                    self._notify(progress_callback, f"⚠️ Ошибка генерации {', '.join(s.name for s in unit)}: {e}")
+                self._notify(progress_callback, f"🖼️ Ideogram: {done}/{total} ({', '.join(s.name for s in unit)})")
+                if self._is_cancelled(cancel_check):
+                    # Снимаем ещё не начатые слоты; запущенные завершатся сами по cancel_check
+                    for pending in futures:
+                        pending.cancel()
+        return results
+
+    def take_cached_slots(
+        self,
+        slots: List[ImageSlot],
+        media_dir: str,
+        batched: bool = False,
+        family_prompts: Optional[Dict[str, str]] = None,
+        progress_callback: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, str]:
+        """
+        Выдаёт в media_dir слоты, уже лежащие в кэше (ключи — как у generate_slots), без запросов к API.
+
+        Returns:
+            dict: имя слота -> путь (только попадания)
+        """
+        found: Dict[str, str] = {}
+        if self.cache is None:
+            return found
+        for slot, prompts in self._slot_cache_prompts(slots, batched, family_prompts):
+            for prompt in prompts:
+                path = self._from_cache(prompt, slot.name, media_dir, progress_callback)
+                if path:
+                    found[slot.name] = path
+                    break
+        return found
+
+    def _slot_cache_prompts(self, slots: List[ImageSlot], batched: bool, family_prompts: Optional[Dict[str, str]]):
+        """(слот, промпты, под которыми он может лежать в кэше) — в порядке проверки"""
+        units = self._group_slots(slots) if batched else [[slot] for slot in slots]
+        for unit in units:
+            for slot in unit:
+                prompts = []
+                if len(unit) > 1:
+                    prompts.append((family_prompts or {}).get(unit[0].family or "") or unit[0].prompt)
+                # Одиночный слот или догенерированный отдельно из пакета — под своим промптом
+                prompts.append(slot.prompt)
+                yield slot, prompts
+
+    def _group_slots(self, slots: List[ImageSlot]) -> List[List[ImageSlot]]:
+        """Группирует слоты по семействам (с сохранением порядка), не больше num_images_per_request в группе."""
+        groups: Dict[str, List[ImageSlot]] = {}
+        units: List[List[ImageSlot]] = []
+        for slot in slots:
+            if not slot.family:
+                units.append([slot])
+                continue
+            group = groups.get(slot.family)
+            if group is None or len(group) >= self.num_images_per_request:
+                group = []
+                groups[slot.family] = group
+                units.append(group)
+            group.append(slot)
+        return units
+
+    def _generate_family(
+        self,
+        unit: List[ImageSlot],
+        family_prompt: str,
+        media_dir: str,
+        progress_callback: Optional[Callable[[str], None]] = None,
+        cancel_check: Optional[Callable[[], bool]] = None,
+    ) -> Dict[str, Optional[str]]:
+        """Один запрос на несколько слотов семейства + пословный фоллбек для неудавшихся."""
+        output_path = Path(media_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        results: Dict[str, Optional[str]] = {}
+        # Закэшированные слоты семейства в запрос не попадают
+        missing: List[ImageSlot] = []
+        for slot in unit:
+            # Слот мог быть догенерирован отдельным запросом — тогда он в кэше под своим промптом
+            cached = (self._from_cache(family_prompt, slot.name, media_dir, progress_callback)
+                      or self._from_cache(slot.prompt, slot.name, media_dir, progress_callback))
+            if cached:
+                results[slot.name] = cached
+            else:
+                missing.append(slot)
+        if not missing:
+            return results
+        unit = missing
+        names = ", ".join(slot.name for slot in unit)
+        self._notify(progress_callback, f"🎨 Ideogram: пакет {names} ({len(unit)} изображений)")
+        urls = self._request_image_urls(family_prompt, num_images=len(unit), cancel_check=cancel_check)
+        for index, slot in enumerate(unit):
+            if self._is_cancelled(cancel_check):
+                results[slot.name] = None
+                continue
+            saved = None
+            if index < len(urls):
+                try:
+                    data = self._download_bytes(urls[index])
+                    if data is not None and not self._is_cancelled(cancel_check):
+                        saved = self._save_slot_bytes(data, slot.name, output_path, progress_callback)
+                        self._to_cache(family_prompt, slot.name, saved)
+                except Exception:
+                    saved = None
+            if saved is None and not self._is_cancelled(cancel_check):
+                self._notify(progress_callback, f"↩️ {slot.name}: повтор отдельным запросом")
+                saved = self.generate_single_image(slot.prompt, slot.name, media_dir, progress_callback, cancel_check=cancel_check)
+            results[slot.name] = saved
+        return results
+
     def generate_single_image(
         self,
         prompt: str,
         image_name: str,
         media_dir: str,
         progress_callback: Optional[Callable[[str], None]] = None,
+        cancel_check: Optional[Callable[[], bool]] = None,
     ) -> Optional[str]:
         """Генерирует одно изображение (num_images=1) без изменения промпта."""
         output_path = Path(media_dir)
         output_path.mkdir(parents=True, exist_ok=True)
 
+        cached = self._from_cache(prompt, image_name, media_dir, progress_callback)
+        if cached:
+            return cached
+
         self._notify(progress_callback, f"🎨 Ideogram: генерация {image_name}")
-        urls = self._request_image_urls(prompt, num_images=1)
+        urls = self._request_image_urls(prompt, num_images=1, cancel_check=cancel_check)
         if not urls:
             self._notify(progress_callback, "⚠️ Ideogram: не удалось получить ссылку изображения")
             return None
+        if self._is_cancelled(cancel_check):
+            return None
 
         try:
-            img = self._download_image(urls[0])
-            if img is None:
+            data = self._download_bytes(urls[0])
+            if data is None:
                 return None
-            if image_name == "favicon":
-                if img.mode != "RGBA":
-                    img = img.convert("RGBA")
-                img = img.resize((512, 512), Image.Resampling.LANCZOS)
-                out_file = output_path / f"{image_name}.png"
-                self._save_png(img, str(out_file))
-                self._notify(progress_callback, f"✅ {image_name}: сохранено (PNG)")
-                return str(out_file)
-            else:
-                out_file = output_path / f"{image_name}.jpg"
-                if self._save_jpeg_under_size(img, str(out_file), target_size_kb=150):
-                    self._notify(progress_callback, f"✅ {image_name}: сохранено (JPEG)")
-                    return str(out_file)
+            if self._is_cancelled(cancel_check):
                 return None
+            saved = self._save_slot_bytes(data, image_name, output_path, progress_callback)
+            self._to_cache(prompt, image_name, saved)
+            return saved
         except Exception:
             return None
 
-    def _request_image_urls(self, prompt: str, num_images: int) -> List[str]:
+    def _cache_key(self, prompt: str, image_name: str) -> str:
+        return ImageCache.make_key(prompt, self.model, self.magic_prompt_option, image_name)
+
+    def _from_cache(self, prompt: str, image_name: str, media_dir: str, progress_callback: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        if self.cache is None:
+            return None
+        path = self.cache.get(self._cache_key(prompt, image_name), media_dir, image_name)
+        if path:
+            self._notify(progress_callback, f"♻️ {image_name}: взято из кэша")
+        return path
+
+    def _to_cache(self, prompt: str, image_name: str, path: Optional[str]) -> None:
+        if self.cache is not None and path:
+            self.cache.put(self._cache_key(prompt, image_name), path)
+
+    def _save_slot_bytes(
+        self,
+        data: bytes,
+        image_name: str,
+        output_path: Path,
+        progress_callback: Optional[Callable[[str], None]] = None,
+    ) -> Optional[str]:
+        """Обрабатывает сырые байты слота в пуле процессов и пишет файл: favicon — PNG, остальные — JPEG."""
+        encoded, ext = postprocess_slot_image(data, image_name, target_size_kb=150)
+        out_file = output_path / f"{image_name}.{ext}"
+        _write_file_atomic(out_file, encoded)
+        self._notify(progress_callback, f"✅ {image_name}: сохранено ({'PNG' if ext == 'png' else 'JPEG'})")
+        return str(out_file)
+
+    def _request_image_urls(self, prompt: str, num_images: int, cancel_check: Optional[Callable[[], bool]] = None) -> List[str]:
         # Если нет API ключа — возвращаем пустой список (сигнализируем об отключённой генерации)
         if not self.api_key:
             if not self.silent_mode:
@@ -219,17 +594,60 @@ class IdeogramGenerator:
                 payload["magic_prompt_option"] = self.magic_prompt_option
         except Exception:
             pass
-        try:
-            if self.debug_billing and not self.silent_mode:
-                print(f"[Ideogram] v3 API payload: {{'rendering_speed': 'TURBO', 'num_images': {payload['num_images']}}}")
-            resp = requests.post(self.api_url, headers=self.headers, json=payload, timeout=60)
-            if resp.status_code != 200:
+        if self.debug_billing and not self.silent_mode:
+            print(f"[Ideogram] v3 API payload: {{'rendering_speed': 'TURBO', 'num_images': {payload['num_images']}}}")
+        limiter = get_rate_limiter()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            if not limiter.acquire(cancel_check=lambda: self._is_cancelled(cancel_check)):
+                return []
+            try:
+                try:
+                    # Ожидание слота могло длиться до конца паузы Retry-After — перед платным POST ещё раз проверяем отмену
+                    if self._is_cancelled(cancel_check):
+                        return []
+                    resp = get_http_session().post(self.api_url, headers=self.headers, json=payload, timeout=60)
+                finally:
+                    limiter.release()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._debug(f"[Ideogram] Сетевая ошибка: {e}")
+                if not _request_not_sent(e):
+                    # Запрос мог быть обработан и оплачен — не повторяем
+                    return []
+            except Exception:
+                return []
+            else:
+                if resp.status_code == 200:
+                    limiter.on_success(resp.headers)
+                    return self._parse_image_urls(resp)
                 if self.debug_billing and not self.silent_mode:
                     try:
                         print(f"[Ideogram] HTTP {resp.status_code}. Body: {resp.text[:500]}")
                     except Exception:
                         pass
-                return []
+                if resp.status_code not in self.retryable_statuses:
+                    return []
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                if resp.status_code == 429:
+                    limiter.on_throttle(retry_after, resp.headers)
+            if attempt >= self.max_retries:
+                break
+            delay = compute_backoff(attempt, retry_after)
+            if not self.silent_mode:
+                print(f"⏳ Ideogram: повтор {attempt + 1}/{self.max_retries} через {delay:.1f}с")
+            # Ждём короткими шагами, чтобы отмена сборки не ждала всю паузу бэкоффа
+            deadline = time.monotonic() + delay
+            while True:
+                if self._is_cancelled(cancel_check):
+                    return []
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(0.25, remaining))
+        return []
+
+    def _parse_image_urls(self, resp: requests.Response) -> List[str]:
+        try:
             data = resp.json() or {}
             if self.debug_billing and not self.silent_mode:
                 try:
@@ -263,12 +681,59 @@ class IdeogramGenerator:
         except Exception:
             return prompt
 
+    def _download_bytes(self, url: str) -> Optional[bytes]:
+        """
+        Потоково скачивает изображение и собирает чанки в один объект bytes.
+        Отбрасывает ответы больше max_download_bytes, не-изображения по Content-Type
+        и данные, сигнатура которых не похожа на JPEG/PNG/WebP/GIF.
+
+        Возвращаются именно bytes: BytesIO и pickle (передача в пул пост-обработки)
+        используют их без дополнительной копии, в отличие от bytearray.
+        """
+        try:
+            with get_http_session().get(url, timeout=60, stream=True) as r:
+                if r.status_code != 200:
+                    return None
+                ctype = (r.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+                if ctype and not ctype.startswith("image/") and ctype != "application/octet-stream":
+                    self._debug(f"[Ideogram] Пропуск загрузки: Content-Type {ctype}")
+                    return None
+                try:
+                    length = int(r.headers.get("Content-Length") or 0)
+                except ValueError:
+                    length = 0
+                if length > self.max_download_bytes:
+                    self._debug(f"[Ideogram] Пропуск загрузки: {length} байт > лимита {self.max_download_bytes}")
+                    return None
+                chunks: List[bytes] = []
+                received = 0
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    received += len(chunk)
+                    if received > self.max_download_bytes:
+                        self._debug(f"[Ideogram] Загрузка прервана: превышен лимит {self.max_download_bytes} байт")
+                        return None
+                    chunks.append(chunk)
+                data = b"".join(chunks)
+                del chunks
+                if not _looks_like_image(data):
+                    self._debug("[Ideogram] Пропуск загрузки: сигнатура не похожа на изображение")
+                    return None
+                return data
+        except Exception:
+            return None
+
     def _download_image(self, url: str) -> Optional[Image.Image]:
         try:
-            r = requests.get(url, timeout=60)
-            if r.status_code != 200:
+            data = self._download_bytes(url)
+            if data is None:
                 return None
-            img = Image.open(BytesIO(r.content))
+            # BytesIO поверх bytes не копирует данные; после load() буфер больше не нужен
+            with BytesIO(data) as stream:
+                img = Image.open(stream)
+                img.load()
+            del data
             # Приводим к RGB для JPEG-сохранения при необходимости
             if img.mode not in ("RGB", "RGBA"):
                 img = img.convert("RGB")
@@ -281,24 +746,30 @@ class IdeogramGenerator:
             img = image
             if img.mode == "RGBA":
                 img = img.convert("RGB")
-            # Подбираем качество, чтобы не превысить размер
-            for q in [85, 75, 65, 55, 45]:
-                img.save(filepath, format="JPEG", quality=q, optimize=True)
-                size_kb = os.path.getsize(filepath) / 1024
-                if size_kb <= target_size_kb:
-                    return True
-            # Если не получилось уложиться, оставляем последнее сохранение
+            # Подбор качества/масштаба идёт в памяти, на диск пишем один раз
+            data = encode_jpeg_under_size(img, target_size_kb)
+            _write_file_atomic(filepath, data)
             return True
         except Exception:
             return False
 
     def _save_png(self, image: Image.Image, filepath: str) -> bool:
         try:
-            image.save(filepath, format="PNG", optimize=True)
+            _write_file_atomic(filepath, encode_png(image))
             return True
         except Exception:
             return False
 
+    def _debug(self, message: str) -> None:
+        if self.debug_billing and not self.silent_mode:
+            print(message)
+
+    def _is_cancelled(self, cancel_check: Optional[Callable[[], bool]]) -> bool:
+        try:
+            return bool(cancel_check and cancel_check())
+        except Exception:
+            return False
+
     def _notify(self, cb: Optional[Callable[[str], None]], message: str) -> None:
         if cb:
             try:
@@ -0,0 +1,136 @@
+"""
+Контент-адресуемый кэш изображений Ideogram
+
+- Ключ: sha256 от (промпт, модель, magic_prompt_option, слот)
+- Хранятся уже обработанные файлы (JPEG/PNG), готовые к копированию в media/
+- Попадание отдаётся копией: жёсткая ссылка делила бы inode с media/ проекта,
+  и перезапись файла на месте (повторная генерация, правка в редакторе) испортила бы кэш
+- LRU-вытеснение по времени последнего использования при превышении лимита размера
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_CACHE_MAX_MB = 500
+CACHE_EXTENSIONS = ("jpg", "png")
+
+
+def default_cache_dir() -> Path:
+    return Path(os.getenv("LANDGEN_IMAGE_CACHE_DIR") or (Path.home() / ".landing_generator_cache" / "images"))
+
+
+class ImageCache:
+    """Кэш обработанных изображений на диске с LRU-вытеснением."""
+
+    def __init__(self, root: Optional[str] = None, max_mb: Optional[int] = None):
+        self.root = Path(root) if root else default_cache_dir()
+        try:
+            self.max_bytes = max(1, int(max_mb or DEFAULT_CACHE_MAX_MB)) * 1024 * 1024
+        except Exception:
+            self.max_bytes = DEFAULT_CACHE_MAX_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    @staticmethod
+    def make_key(prompt: str, model: str, magic_prompt_option: str, slot: str) -> str:
+        raw = json.dumps([prompt or "", model or "", magic_prompt_option or "", slot or ""], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path_for(self, key: str, ext: str) -> Path:
+        return self.root / key[:2] / f"{key}.{ext}"
+
+    def get(self, key: str, dest_dir: str, name: str) -> Optional[str]:
+        """Размещает закэшированный файл в dest_dir/name.<ext>. Возвращает путь или None (промах)."""
+        for ext in CACHE_EXTENSIONS:
+            src = self._path_for(key, ext)
+            if not src.exists():
+                continue
+            dest = Path(dest_dir) / f"{name}.{ext}"
+            try:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                # Копия через временный файл: dest не разделяет inode с записью кэша
+                tmp = dest.with_name(f".{dest.name}.{threading.get_ident()}.tmp")
+                shutil.copyfile(src, tmp)
+                os.replace(tmp, dest)
+                # Отмечаем использование для LRU
+                os.utime(src, None)
+                return str(dest)
+            except Exception as e:
+                print(f"⚠️ Кэш изображений: не удалось выдать {name}: {e}")
+                return None
+        return None
+
+    def put(self, key: str, src_path: str) -> None:
+        """Кладёт обработанный файл в кэш (атомарно) и при необходимости вытесняет старые записи."""
+        try:
+            src = Path(src_path)
+            ext = src.suffix.lstrip(".").lower()
+            if ext not in CACHE_EXTENSIONS or not src.exists():
+                return
+            dest = self._path_for(key, ext)
+            if dest.exists():
+                return
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(f".{dest.name}.{threading.get_ident()}.tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+            size = dest.stat().st_size
+            with self._lock:
+                if self._total_bytes is not None:
+                    self._total_bytes += size
+            self._evict_if_needed()
+        except Exception as e:
+            print(f"⚠️ Кэш изображений: не удалось сохранить: {e}")
+
+    def _scan(self) -> Dict[Path, os.stat_result]:
+        entries: Dict[Path, os.stat_result] = {}
+        if not self.root.exists():
+            return entries
+        for sub in self.root.iterdir():
+            if not sub.is_dir():
+                continue
+            for f in sub.iterdir():
+                if f.suffix.lstrip(".") in CACHE_EXTENSIONS:
+                    try:
+                        entries[f] = f.stat()
+                    except OSError:
+                        continue
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        with self._lock:
+            if self._total_bytes is not None and self._total_bytes <= self.max_bytes:
+                return
+            entries = self._scan()
+            total = sum(st.st_size for st in entries.values())
+            if total > self.max_bytes:
+                # Самые давно использованные — первыми
+                for path, st in sorted(entries.items(), key=lambda item: item[1].st_mtime):
+                    try:
+                        path.unlink()
+                        total -= st.st_size
+                    except OSError:
+                        continue
+                    if total <= self.max_bytes:
+                        break
+            self._total_bytes = total
+
+
+_cache: Optional[ImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache(max_mb: Optional[int] = None) -> ImageCache:
+    """Возвращает общий для процесса кэш изображений (лимит можно обновить вызовом с max_mb)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ImageCache(max_mb=max_mb)
+        elif max_mb:
+            _cache.max_bytes = max(1, int(max_mb)) * 1024 * 1024
+        return _cache
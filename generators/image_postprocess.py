@@ -0,0 +1,175 @@
+"""
+Пост-обработка изображений Ideogram в отдельных процессах
+
+- Декодирование, ресайз favicon (LANCZOS) и подбор JPEG-сжатия — CPU-bound и держат GIL,
+  поэтому выполняются в общем ProcessPoolExecutor на всех ядрах
+- Сетевые потоки передают сюда сырые байты и получают готовые байты файла
+- Воркеры запускаются через spawn: пул создаётся лениво из рабочего потока, а fork
+  многопоточного процесса (HTTP-сессии, блокировки ограничителя) может повесить дочерний
+- Если пул недоступен (отключён, сломан, нет поддержки процессов) — обработка идёт в текущем потоке
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Optional, Tuple
+
+from PIL import Image
+
+
+# Границы подбора качества JPEG и минимальный масштаб при даунскейле
+JPEG_MAX_QUALITY = 85
+JPEG_MIN_QUALITY = 45
+JPEG_MIN_SCALE = 0.5
+# Не больше стольких кодирований на одно изображение (включая даунскейл)
+JPEG_MAX_ENCODES = 8
+# Даунскейл, если качество не помогает уложиться в лимит — по умолчанию выключен
+JPEG_ALLOW_DOWNSCALE = str(os.getenv("IDEOGRAM_JPEG_DOWNSCALE", "0")).lower() in ("1", "true", "yes")
+
+FAVICON_SIZE = (512, 512)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pool_disabled = str(os.getenv("IDEOGRAM_POSTPROCESS_POOL", "1")).lower() in ("0", "false", "no")
+
+
+def _encode_jpeg(img: Image.Image, quality: int) -> bytes:
+    buf = BytesIO()
+    img.save(buf, format="JPEG", quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def encode_jpeg_under_size(image: Image.Image, target_size_kb: int = 150, allow_downscale: bool = JPEG_ALLOW_DOWNSCALE) -> bytes:
+    """
+    Кодирует изображение в JPEG не больше target_size_kb (в памяти).
+
+    Качество подбирается бинарным поиском в [JPEG_MIN_QUALITY, JPEG_MAX_QUALITY] —
+    берётся максимальное, укладывающееся в лимит. Если даже минимальное качество
+    не помещается и allow_downscale включён, изображение уменьшается (шаг 0.85)
+    до JPEG_MIN_SCALE. Всего не больше JPEG_MAX_ENCODES кодирований; если уложиться
+    не удалось — возвращается самый компактный из полученных вариантов.
+    """
+    img = image.convert("RGB") if image.mode != "RGB" else image
+    limit = int(target_size_kb * 1024)
+    width, height = img.size
+    scale = 1.0
+    smallest = b""
+    encodes = 0
+
+    def _encode(candidate: Image.Image, quality: int) -> bytes:
+        nonlocal smallest, encodes
+        encodes += 1
+        data = _encode_jpeg(candidate, quality)
+        if not smallest or len(data) < len(smallest):
+            smallest = data
+        return data
+
+    while True:
+        candidate = img if scale == 1.0 else img.resize(
+            (max(1, int(width * scale)), max(1, int(height * scale))), Image.Resampling.LANCZOS
+        )
+        if scale == 1.0:
+            data = _encode(candidate, JPEG_MAX_QUALITY)
+            if len(data) <= limit:
+                return data
+            lo, hi = JPEG_MIN_QUALITY, JPEG_MAX_QUALITY - 1
+        else:
+            # После уменьшения ищем в том же диапазоне, но бюджет кодирований общий
+            lo, hi = JPEG_MIN_QUALITY, JPEG_MAX_QUALITY
+        best = None
+        while lo <= hi and encodes < JPEG_MAX_ENCODES:
+            mid = (lo + hi) // 2
+            data = _encode(candidate, mid)
+            if len(data) <= limit:
+                best = data
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        if best is not None:
+            return best
+        scale *= 0.85
+        if not allow_downscale or scale < JPEG_MIN_SCALE or encodes >= JPEG_MAX_ENCODES:
+            return smallest
+
+
+def encode_png(image: Image.Image) -> bytes:
+    buf = BytesIO()
+    image.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+def process_slot_image(data: bytes, image_name: str, target_size_kb: int = 150) -> Tuple[bytes, str]:
+    """
+    Декодирует сырые байты и готовит файл слота (выполняется в процессе-воркере).
+
+    Returns:
+        tuple: (байты файла, расширение) — favicon: PNG 512x512, остальные: JPEG до target_size_kb
+    """
+    img = Image.open(BytesIO(data))
+    img.load()
+    if image_name == "favicon":
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
+        img = img.resize(FAVICON_SIZE, Image.Resampling.LANCZOS)
+        return encode_png(img), "png"
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB")
+    return encode_jpeg_under_size(img, target_size_kb), "jpg"
+
+
+def _default_workers() -> int:
+    try:
+        return max(1, int(os.getenv("IDEOGRAM_POSTPROCESS_WORKERS", "0")) or (os.cpu_count() or 2))
+    except Exception:
+        return os.cpu_count() or 2
+
+
+def get_postprocess_pool() -> Optional[ProcessPoolExecutor]:
+    """Возвращает общий пул процессов пост-обработки (создаётся при первом обращении)."""
+    global _pool, _pool_disabled
+    if _pool_disabled:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None and not _pool_disabled:
+                try:
+                    _pool = ProcessPoolExecutor(max_workers=_default_workers(), mp_context=multiprocessing.get_context("spawn"))
+                except Exception as e:
+                    print(f"⚠️ Пул пост-обработки недоступен, обработка в потоке: {e}")
+                    _pool_disabled = True
+    return _pool
+
+
+def shutdown_postprocess_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        try:
+            pool.shutdown(wait=False, cancel_futures=True)
+        except Exception:
+            pass
+
+
+def postprocess_slot_image(data: bytes, image_name: str, target_size_kb: int = 150) -> Tuple[bytes, str]:
+    """Обрабатывает изображение слота в пуле процессов; при сбое пула — в текущем потоке."""
+    global _pool_disabled
+    pool = get_postprocess_pool()
+    if pool is not None:
+        try:
+            return pool.submit(process_slot_image, data, image_name, target_size_kb).result()
+        except (OSError, ValueError):
+            # Некорректные данные изображения — повтор в потоке не поможет
+            raise
+        except Exception as e:
+            # BrokenProcessPool и т.п.: больше не используем пул в этом процессе
+            print(f"⚠️ Пул пост-обработки отключён: {e}")
+            _pool_disabled = True
+            shutdown_postprocess_pool()
+    return process_slot_image(data, image_name, target_size_kb)
+
+
+atexit.register(shutdown_postprocess_pool)
@@ -0,0 +1,217 @@
+"""
+Предзаготовка наборов изображений по тематикам (пул вариантов)
+
+- В режиме сетки одна тематика часто идёт на много доменов: пока очередь строится,
+  в фоне заполняется пул из N неиспользованных наборов (8 слотов) на каждую тематику
+- Сборка лендинга забирает готовый набор из пула (перемещение файлов) вместо генерации
+- Пул хранится на диске: <root>/<хэш тематики>/ready/<id набора>/, незавершённые наборы
+  собираются в .building/ и становятся доступными только после атомарного переименования
+- Пул пополняется только пока партия активна (request ... release); одновременно
+  строится не больше max_workers наборов — очереди платных запросов нет
+- shutdown() отменяет подготовку при закрытии окна приложения (и из atexit для прочих сценариев)
+- Готовые наборы оплачены и не удаляются автоматически — они ждут следующей партии с той же тематикой
+"""
+
+import atexit
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from generators.ideogram_generator import build_landing_family_prompts, build_landing_slots
+
+DEFAULT_SETS_PER_THEME = 2
+
+
+def default_pool_dir() -> Path:
+    return Path(os.getenv("LANDGEN_IMAGE_POOL_DIR") or (Path.home() / ".landing_generator_cache" / "pool"))
+
+
+class ImagePrefetcher:
+    """Фоновое заполнение пула наборов изображений по тематикам."""
+
+    def __init__(self, root: Optional[str] = None, max_workers: int = 2):
+        self.root = Path(root) if root else default_pool_dir()
+        self.max_workers = max(1, int(max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        # Тематика -> строящиеся сейчас наборы / готовые наборы в пуле (счётчик в памяти, без I/O под блокировкой)
+        self._inflight: Dict[str, int] = {}
+        self._ready: Dict[str, int] = {}
+        # Тематика -> желаемое число наборов и фабрика генератора (только для активной партии)
+        self._targets: Dict[str, int] = {}
+        self._factories: Dict[str, Callable] = {}
+
+    @staticmethod
+    def _theme_key(theme: str) -> str:
+        return hashlib.sha1((theme or "").strip().lower().encode("utf-8")).hexdigest()[:16]
+
+    def _ready_dir(self, theme: str) -> Path:
+        return self.root / self._theme_key(theme) / "ready"
+
+    def _scan_ready(self, theme: str) -> int:
+        """Считает готовые наборы тематики на диске"""
+        try:
+            return sum(1 for d in self._ready_dir(theme).iterdir() if d.is_dir())
+        except OSError:
+            return 0
+
+    def ready_count(self, theme: str) -> int:
+        return self._scan_ready(theme)
+
+    def is_active(self, theme: str) -> bool:
+        with self._lock:
+            return self._targets.get(theme.strip(), 0) > 0
+
+    def request(self, themes: Iterable[str], generator_factory: Callable, sets_per_theme: int = DEFAULT_SETS_PER_THEME) -> None:
+        """
+        Начинает заполнение пула до sets_per_theme наборов для каждой тематики (до вызова release).
+
+        Args:
+            generator_factory: () -> (IdeogramGenerator, batched); генератор должен быть без кэша,
+                иначе все наборы одной тематики окажутся одинаковыми
+        """
+        if self._closed.is_set():
+            return
+        for theme in {t.strip() for t in themes if t and t.strip()}:
+            # Диск читаем до захвата блокировки
+            ready = self._scan_ready(theme)
+            with self._lock:
+                self._ready[theme] = ready
+                self._targets[theme] = max(0, int(sets_per_theme))
+                self._factories[theme] = generator_factory
+        self._pump()
+
+    def release(self, themes: Optional[Iterable[str]] = None) -> None:
+        """
+        Партия завершена: тематики (по умолчанию все) больше не пополняются.
+        Уже строящиеся наборы достраиваются и остаются в пуле для следующей партии.
+        """
+        with self._lock:
+            for theme in list(self._targets) if themes is None else {t.strip() for t in themes if t}:
+                self._targets.pop(theme, None)
+                self._factories.pop(theme, None)
+
+    def shutdown(self) -> None:
+        """Останавливает предзаготовку: новые наборы не начинаются, строящиеся прерываются по отмене"""
+        self._closed.set()
+        self.release()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _pump(self) -> None:
+        # В работе не больше max_workers наборов: очереди платных запросов в executor нет
+        to_start = []
+        with self._lock:
+            busy = sum(self._inflight.values())
+            progress = True
+            while busy < self.max_workers and progress and not self._closed.is_set():
+                progress = False
+                for theme, target in self._targets.items():
+                    if busy >= self.max_workers:
+                        break
+                    if target - self._ready.get(theme, 0) - self._inflight.get(theme, 0) > 0:
+                        self._inflight[theme] = self._inflight.get(theme, 0) + 1
+                        busy += 1
+                        to_start.append((theme, self._factories[theme]))
+                        progress = True
+        for theme, factory in to_start:
+            try:
+                self._executor.submit(self._build_set, theme, factory)
+            except RuntimeError:
+                # Executor уже остановлен (shutdown)
+                with self._lock:
+                    self._inflight[theme] = max(0, self._inflight.get(theme, 0) - 1)
+
+    def _build_set(self, theme: str, factory: Callable) -> None:
+        building = self.root / self._theme_key(theme) / ".building" / uuid.uuid4().hex
+        try:
+            if self._closed.is_set():
+                return
+            ideogram, batched = factory()
+            building.mkdir(parents=True, exist_ok=True)
+            slots = build_landing_slots(theme)
+            results = ideogram.generate_slots(
+                slots, str(building), None, cancel_check=self._closed.is_set,
+                batched=batched, family_prompts=build_landing_family_prompts(theme),
+            )
+            if all(results.get(slot.name) for slot in slots):
+                ready = self._ready_dir(theme)
+                ready.mkdir(parents=True, exist_ok=True)
+                os.replace(building, ready / building.name)
+                with self._lock:
+                    self._ready[theme] = self._ready.get(theme, 0) + 1
+                    count = self._ready[theme]
+                print(f"📦 Пул изображений: готов набор для «{theme}» ({count} в пуле)")
+        except Exception as e:
+            print(f"⚠️ Пул изображений: ошибка подготовки набора для «{theme}»: {e}")
+        finally:
+            shutil.rmtree(building, ignore_errors=True)
+            with self._lock:
+                self._inflight[theme] = max(0, self._inflight.get(theme, 0) - 1)
+            self._pump()
+
+    def take_set(self, theme: str, media_dir: str) -> bool:
+        """
+        Забирает готовый набор тематики в media_dir. Возвращает True, если набор перенесён.
+        Захват атомарный (переименование), поэтому параллельные сборки не получат один набор.
+        """
+        theme = (theme or "").strip()
+        ready = self._ready_dir(theme)
+        try:
+            candidates = sorted(d for d in ready.iterdir() if d.is_dir())
+        except OSError:
+            return False
+        claimed_root = self.root / self._theme_key(theme) / ".claimed"
+        for candidate in candidates:
+            claimed = claimed_root / candidate.name
+            try:
+                claimed_root.mkdir(parents=True, exist_ok=True)
+                os.replace(candidate, claimed)
+            except OSError:
+                # Набор уже забрала другая сборка
+                continue
+            with self._lock:
+                self._ready[theme] = max(0, self._ready.get(theme, 0) - 1)
+            try:
+                dest = Path(media_dir)
+                dest.mkdir(parents=True, exist_ok=True)
+                for f in claimed.iterdir():
+                    shutil.move(str(f), str(dest / f.name))
+                return True
+            except Exception as e:
+                print(f"⚠️ Пул изображений: не удалось перенести набор: {e}")
+                return False
+            finally:
+                shutil.rmtree(claimed, ignore_errors=True)
+                # Пул пополняется, только пока партия с этой тематикой активна
+                self._pump()
+        return False
+
+
+_prefetcher: Optional[ImagePrefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_image_prefetcher() -> ImagePrefetcher:
+    """Возвращает общий для процесса пул предзаготовленных наборов."""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = ImagePrefetcher()
+        return _prefetcher
+
+
+def shutdown_image_prefetcher() -> None:
+    """Отменяет предзаготовку (закрытие приложения), если пул создавался"""
+    with _prefetcher_lock:
+        prefetcher = _prefetcher
+    if prefetcher is not None:
+        prefetcher.shutdown()
+
+
+atexit.register(shutdown_image_prefetcher)
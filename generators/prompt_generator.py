@@ -3,6 +3,12 @@
 Разбит из smart_prompt_generator.py для лучшей организации
 """
 
+import os
+from pathlib import Path
+
+from generators.prompt_template import PromptTemplate, TemplateSource
+from shared.helpers import get_current_year, get_language_display_name, get_language_name_by_code
+
 
 class SmartPromptGenerator:
     """УМНАЯ система генерации промптов для любых тематик БЕЗ интернета"""
@@ -36,29 +42,8 @@ class SmartPromptGenerator:
     
  
 
-def create_landing_prompt(country, city, language, domain, theme):
-    """
-    Создает промпт для генерации лендинга
-    
-    Args:
-        country (str): Название страны
-        city (str): Название города
-        language (str): Язык лендинга (код)
-        domain (str): Домен сайта
-        theme (str): Тематика лендинга
-    
-    Returns:
-        str: Готовый промпт для Cursor AI
-    """
-    from shared.helpers import get_current_year, get_language_display_name, get_language_name_by_code
-    
-    current_year = get_current_year()
-    
-    # Получаем человеко-читаемое название языка
-    # Если язык переопределён вручную — используем название по коду, иначе по стране
-    language_display = get_language_name_by_code(language) if language else get_language_display_name(country)
-    
-    return f"""You are an experienced web developer commissioned to build a fully functional business website. The site must be highly realistic, complete, and written as if it was handcrafted by real people — not generated by AI.
+# Встроенный шаблон промпта лендинга (слоты — см. generators/prompt_template.SLOT_TYPES)
+LANDING_PROMPT_TEMPLATE = """You are an experienced web developer commissioned to build a fully functional business website. The site must be highly realistic, complete, and written as if it was handcrafted by real people — not generated by AI.
 
 Each site is built in a new, isolated project, with no memory of previous work. No site should resemble any other. Use a different style, structure, and visual approach each time you generate a site.
 
@@ -194,4 +179,53 @@ IMPORTANT – FILESYSTEM RULES (STRICT):
 - Contact information should include:
   - Email with domain: contact@{domain}
   - Realistic phone number for {country}
-  - Realistic address in {city}, {country}""" 
\ No newline at end of file
+  - Realistic address in {city}, {country}"""
+
+# Пользовательский шаблон: файл LANDGEN_PROMPT_TEMPLATE или ~/.landing_generator_templates/landing_prompt.txt
+_landing_template = TemplateSource(
+    PromptTemplate(LANDING_PROMPT_TEMPLATE),
+    os.environ.get("LANDGEN_PROMPT_TEMPLATE") or Path.home() / ".landing_generator_templates" / "landing_prompt.txt",
+)
+
+
+def get_landing_template(version=None):
+    """
+    Возвращает активный скомпилированный шаблон (пользовательский, если задан и корректен)
+
+    Args:
+        version (str): Версия ранее использованного шаблона — вернуть именно её (None, если неизвестна)
+    """
+    if version is not None:
+        return _landing_template.by_version(version)
+    return _landing_template.get()
+
+
+def build_landing_prompt_params(country, city, language, domain, theme):
+    """Значения слотов шаблона для лендинга"""
+    # Получаем человеко-читаемое название языка
+    # Если язык переопределён вручную — используем название по коду, иначе по стране
+    return {
+        "domain": domain,
+        "country": country,
+        "language_display": get_language_name_by_code(language) if language else get_language_display_name(country),
+        "city": city,
+        "theme": theme,
+        "current_year": get_current_year(),
+    }
+
+
+def create_landing_prompt(country, city, language, domain, theme):
+    """
+    Создает промпт для генерации лендинга
+    
+    Args:
+        country (str): Название страны
+        city (str): Название города
+        language (str): Язык лендинга (код)
+        domain (str): Домен сайта
+        theme (str): Тематика лендинга
+    
+    Returns:
+        str: Готовый промпт для Cursor AI
+    """
+    return get_landing_template().render(**build_landing_prompt_params(country, city, language, domain, theme))
@@ -0,0 +1,126 @@
+"""
+Скомпилированные шаблоны промптов
+Текст шаблона разбирается один раз: статические куски + типизированные слоты {name};
+рендер — склейка списка через join. Пользовательский шаблон читается с диска
+и перечитывается при изменении файла (hot reload).
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Допустимые слоты и их типы (значения приводятся к типу при рендере)
+SLOT_TYPES: Dict[str, type] = {
+    "domain": str,
+    "country": str,
+    "language_display": str,
+    "city": str,
+    "theme": str,
+    "current_year": int,
+}
+
+# {{ и }} — экранированные фигурные скобки, {name} — слот
+_TOKEN_RE = re.compile(r"\{\{|\}\}|\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+class PromptTemplateError(ValueError):
+    """Ошибка разбора шаблона (неизвестный слот)"""
+
+
+class PromptTemplate:
+    """Шаблон, разобранный на статические части и слоты"""
+
+    def __init__(self, source: str, name: str = "builtin"):
+        self.source = source
+        self.name = name
+        # Версия — хэш текста: по ней история хранит ссылку на шаблон вместо полного промпта
+        self.version = hashlib.sha256(source.encode("utf-8")).hexdigest()[:12]
+        self._parts: List[str] = []
+        self._slots: List[Tuple[int, str]] = []  # (индекс в _parts, имя слота)
+        self._compile()
+
+    def _compile(self):
+        parts: List[str] = []
+        chunk: List[str] = []
+        pos = 0
+        for match in _TOKEN_RE.finditer(self.source):
+            chunk.append(self.source[pos:match.start()])
+            token = match.group(0)
+            name = match.group(1)
+            if name is None:
+                chunk.append(token[0])
+            else:
+                if name not in SLOT_TYPES:
+                    raise PromptTemplateError(f"Неизвестный слот {{{name}}} в шаблоне '{self.name}'")
+                parts.append("".join(chunk))
+                chunk = []
+                self._slots.append((len(parts), name))
+                parts.append("")
+            pos = match.end()
+        chunk.append(self.source[pos:])
+        parts.append("".join(chunk))
+        self._parts = parts
+        self.slot_names = tuple(sorted({name for _, name in self._slots}))
+
+    def render(self, **values) -> str:
+        try:
+            typed = {name: str(SLOT_TYPES[name](values[name])) for name in self.slot_names}
+        except KeyError:
+            missing = [name for name in self.slot_names if name not in values]
+            raise PromptTemplateError(f"Не заданы слоты: {', '.join(missing)}") from None
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            parts[index] = typed[name]
+        return "".join(parts)
+
+
+class TemplateSource:
+    """Пользовательский шаблон из файла с перечитыванием при изменении; иначе — встроенный"""
+
+    # Файл проверяется не чаще раза в столько секунд (рендер сотен промптов подряд не делает stat на каждый)
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self, builtin: PromptTemplate, path: Optional[Path] = None):
+        self.builtin = builtin
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._loaded: Optional[PromptTemplate] = None
+        self._signature = None
+        self._checked_at = None
+        # Все выданные за время работы версии (при hot reload старая версия остаётся доступной)
+        self._versions: Dict[str, PromptTemplate] = {builtin.version: builtin}
+
+    def by_version(self, version: str) -> Optional[PromptTemplate]:
+        """Шаблон, выданный ранее с этой версией (None — неизвестна)"""
+        with self._lock:
+            return self._versions.get(version)
+
+    def get(self) -> PromptTemplate:
+        if self.path is None:
+            return self.builtin
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.CHECK_INTERVAL:
+            return self._loaded or self.builtin
+        self._checked_at = now
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._loaded, self._signature = None, None
+            return self.builtin
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if signature != self._signature:
+                self._signature = signature
+                try:
+                    text = self.path.read_text(encoding="utf-8")
+                    self._loaded = PromptTemplate(text, name=str(self.path))
+                    self._versions[self._loaded.version] = self._loaded
+                    print(f"📝 Загружен шаблон промпта: {self.path}")
+                except (OSError, UnicodeError, PromptTemplateError) as e:
+                    print(f"⚠️ Шаблон промпта не загружен ({e}), используется встроенный")
+                    self._loaded = None
+            return self._loaded or self.builtin
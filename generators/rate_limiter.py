@@ -0,0 +1,174 @@
+"""
+Адаптивный ограничитель запросов к Ideogram API
+
+- Token bucket: не больше rate запросов в секунду (с запасом burst)
+- Ограничение одновременных запросов, которое само снижается при 429 и медленно
+  восстанавливается при успешных ответах (AIMD)
+- Учитывает Retry-After и заголовки X-RateLimit-* (пауза для всех потоков процесса)
+- compute_backoff — экспоненциальная задержка с джиттером для повторов
+"""
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterator, Mapping, Optional
+
+DEFAULT_RATE_PER_SEC = 2.0
+DEFAULT_BURST = 5
+DEFAULT_MAX_IN_FLIGHT = 10
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+# Как часто ожидание слота проверяет отмену сборки
+CANCEL_POLL_INTERVAL = 0.25
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.01, float(os.getenv(name, str(default))))
+    except Exception:
+        return default
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After: секунды или HTTP-дата. Возвращает задержку в секундах или None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def compute_backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Задержка перед повтором: full jitter от base*2^attempt, но не меньше Retry-After."""
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** max(0, attempt)))
+    delay = random.uniform(ceiling / 2, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return min(delay, BACKOFF_MAX_SECONDS * 2)
+
+
+class AdaptiveRateLimiter:
+    """Общий для процесса ограничитель: скорость (token bucket) + число запросов в полёте."""
+
+    def __init__(self, rate_per_sec: float = DEFAULT_RATE_PER_SEC, burst: int = DEFAULT_BURST, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.max_rate = float(rate_per_sec)
+        self.rate = float(rate_per_sec)
+        self.burst = max(1, int(burst))
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.in_flight_limit = self.max_in_flight
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, cancel_check: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Ждёт паузы (после 429), свободного слота и токена.
+
+        Returns:
+            bool: True — слот получен; False — ожидание прервано cancel_check (слот не занят)
+        """
+        with self._cond:
+            while True:
+                if cancel_check is not None and cancel_check():
+                    return False
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._in_flight >= self.in_flight_limit:
+                    wait = None
+                elif self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self._in_flight += 1
+                    return True
+                else:
+                    wait = (1.0 - self._tokens) / self.rate
+                if cancel_check is not None:
+                    # Отмену проверяем хотя бы раз в CANCEL_POLL_INTERVAL
+                    wait = CANCEL_POLL_INTERVAL if wait is None else min(wait, CANCEL_POLL_INTERVAL)
+                self._cond.wait(timeout=wait)
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Успешный ответ: плавно возвращаем скорость и параллельность к максимуму."""
+        with self._cond:
+            self._successes += 1
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+            if self._successes % 5 == 0 and self.in_flight_limit < self.max_in_flight:
+                self.in_flight_limit += 1
+            self._apply_headers(headers)
+            self._cond.notify_all()
+
+    def on_throttle(self, retry_after: Optional[float] = None, headers: Optional[Mapping[str, str]] = None) -> None:
+        """429: вдвое снижаем скорость и параллельность, ставим общую паузу по Retry-After."""
+        with self._cond:
+            self._successes = 0
+            self.rate = max(self.max_rate / 20, self.rate / 2)
+            self.in_flight_limit = max(1, self.in_flight_limit // 2)
+            self._tokens = 0.0
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._apply_headers(headers)
+            print(f"⏳ Ideogram: лимит запросов, скорость {self.rate:.2f}/с, параллельно {self.in_flight_limit}")
+
+    def _apply_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        # X-RateLimit-Remaining: 0 + X-RateLimit-Reset — ждём сброса окна
+        if not headers:
+            return
+        try:
+            remaining = headers.get("X-RateLimit-Remaining") or headers.get("RateLimit-Remaining")
+            reset = headers.get("X-RateLimit-Reset") or headers.get("RateLimit-Reset")
+            if remaining is None or reset is None or int(float(remaining)) > 0:
+                return
+            reset_value = float(reset)
+            # Бывает как абсолютное время (epoch), так и секунды до сброса
+            delay = reset_value - time.time() if reset_value > 1e9 else reset_value
+            if delay > 0:
+                self._paused_until = max(self._paused_until, time.monotonic() + min(delay, BACKOFF_MAX_SECONDS))
+        except Exception:
+            pass
+
+
+_limiter: Optional[AdaptiveRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Возвращает общий ограничитель (параметры — IDEOGRAM_RATE_PER_SEC, IDEOGRAM_RATE_BURST, IDEOGRAM_MAX_IN_FLIGHT)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = AdaptiveRateLimiter(
+                rate_per_sec=_env_float("IDEOGRAM_RATE_PER_SEC", DEFAULT_RATE_PER_SEC),
+                burst=int(_env_float("IDEOGRAM_RATE_BURST", DEFAULT_BURST)),
+                max_in_flight=int(_env_float("IDEOGRAM_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)),
+            )
+        return _limiter
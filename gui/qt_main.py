@@ -2,15 +2,21 @@ from PySide6 import QtWidgets, QtGui, QtCore
 import sys
 import platform
 import os
+import json
+import threading
 from pathlib import Path
 
-from shared.settings_manager import SettingsManager, get_desktop_path
+from shared.settings_manager import get_settings_manager, get_desktop_path
 from core.version import VERSION
-from shared.helpers import validate_domain, get_language_by_country, get_language_display_name, check_directory_exists, ensure_empty_zip_for_landing, sanitize_filename, get_country_short_code
+from core import startup_profile
+from shared.helpers import validate_domain, validate_domains, get_language_by_country, get_language_display_name, check_directory_exists, ensure_empty_zip_for_landing, sanitize_filename, get_country_short_code
 from shared.city_generator import CityGenerator
 from shared.data import COUNTRIES_DATA
 from core.cursor_manager import CursorManager
-from generators.prompt_generator import create_landing_prompt
+from core.job_scheduler import JobScheduler
+from core.build_pipeline import build_landing
+from core.job_journal import JobJournal, find_unfinished_journals
+from generators.prompt_generator import create_landing_prompt, get_landing_template
 from core.update_checker import UpdateChecker
 
 
@@ -21,8 +27,10 @@ class QtMainWindow(QtWidgets.QMainWindow):
 		self.resize(1100, 780)
 		self.setMinimumSize(980, 720)
 
-		self.settings = SettingsManager()
+		self.settings = get_settings_manager()
 		self.cursor_manager = CursorManager()
+		# Поиск Cursor — в фоне, к первой сборке путь обычно уже найден и закэширован
+		self.cursor_manager.start_background_discovery()
 		self.city_generator = CityGenerator()
 
 		self.country = ""
@@ -31,10 +39,16 @@ class QtMainWindow(QtWidgets.QMainWindow):
 		self.domain = ""
 
 		self._bg_threads = []
-		self.max_parallel = 10
-		self._active_builds = 0
-		self._build_queue = []  # list of params dicts
-		self._active_jobs = []  # running params
+		try:
+			self.max_parallel = max(1, int(self.settings.settings.get("max_parallel_builds", 10)))
+		except Exception:
+			self.max_parallel = 10
+		# Пул сборок: очередь + активные задачи по id; колбэки приходят из рабочих потоков
+		self._scheduler = JobScheduler(
+			self.max_parallel,
+			on_started=lambda job_id, _p: QtCore.QMetaObject.invokeMethod(self, "_on_build_started", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(int, job_id)),
+			on_finished=lambda job_id, _p: QtCore.QMetaObject.invokeMethod(self, "_on_build_finished", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(int, job_id)),
+		)
 		self._job_seq = 1
 		self._last_city_by_country = {}
 		self._pending_update_sha = None
@@ -62,6 +76,8 @@ class QtMainWindow(QtWidgets.QMainWindow):
 		self._apply_modern_style()
 		self._load_initial_state()
 		self._init_city()
+		# Незавершённые партии (журналы в папке сохранения) — предлагаем продолжить
+		QtCore.QTimer.singleShot(1000, self._offer_resume_batches)
 
 	def _get_current_exe_path(self) -> Path:
 		"""Надёжно определяет путь текущего исполняемого файла на Windows (WinAPI),
@@ -256,13 +272,20 @@ class QtMainWindow(QtWidgets.QMainWindow):
 		self.fav_list.itemDoubleClicked.connect(self._on_favorite_double_clicked)
 		left_layout.addWidget(self.fav_list)
 		# История последних лендингов
-		hist_title = QtWidgets.QLabel("Последние 10 лендингов")
+		hist_title = QtWidgets.QLabel("История лендингов")
 		hist_title.setStyleSheet("color:#cbd5e1; font-size:12px; margin-top:6px;")
 		left_layout.addWidget(hist_title)
+		self.hist_search = QtWidgets.QLineEdit()
+		self.hist_search.setPlaceholderText("Поиск по домену или тематике...")
+		self.hist_search.textChanged.connect(lambda _t: self._rebuild_history_list())
+		left_layout.addWidget(self.hist_search)
 		self.hist_list = QtWidgets.QListWidget()
 		self.hist_list.setToolTip("Клик — скопировать промпт в буфер обмена")
 		self.hist_list.itemClicked.connect(self._on_history_clicked)
 		left_layout.addWidget(self.hist_list)
+		self.hist_more_btn = QtWidgets.QPushButton("Показать ещё")
+		self.hist_more_btn.clicked.connect(lambda: self._rebuild_history_list(append=True))
+		left_layout.addWidget(self.hist_more_btn)
 
 		# Укладываем две колонки рядом
 		right_widget = QtWidgets.QWidget()
@@ -564,8 +587,7 @@ class QtMainWindow(QtWidgets.QMainWindow):
 
 	def _on_model_change(self, text: str):
 		try:
-			self.settings.settings["ideogram_model"] = text.strip()
-			self.settings.save_settings()
+			self.settings.set_value("ideogram_model", text.strip())
 			self.status_label.setText(f"✅ Модель Ideogram: {text}")
 		except Exception:
 			pass
@@ -700,13 +722,23 @@ class QtMainWindow(QtWidgets.QMainWindow):
 				font.setBold(True)
 				item.setFont(font)
 			self.fav_list.addItem(item)
-		# История лендингов
-		self.hist_list.clear()
-		for e in self.settings.get_landing_history():
+		self._rebuild_history_list()
+
+	def _rebuild_history_list(self, append: bool = False):
+		"""История лендингов постранично (по 10), с фильтром из строки поиска"""
+		page_size = 10
+		query = self.hist_search.text().strip()
+		offset = self.hist_list.count() if append else 0
+		if not append:
+			self.hist_list.clear()
+		for e in self.settings.get_landing_history(limit=page_size, offset=offset, query=query):
 			text = e.get("domain", "")
+			if e.get("theme"):
+				text = f"{text} — {e['theme']}"
 			item = QtWidgets.QListWidgetItem(text)
 			item.setData(QtCore.Qt.UserRole, e)
 			self.hist_list.addItem(item)
+		self.hist_more_btn.setVisible(self.hist_list.count() < self.settings.count_landing_history(query))
 
 	def _update_last_country_label(self):
 		last = self.settings.get_last_selected_country()
@@ -795,8 +827,28 @@ class QtMainWindow(QtWidgets.QMainWindow):
 			auto_paste_cb = QtWidgets.QCheckBox("Автоматически вставлять промпт в Cursor")
 			auto_paste_cb.setChecked(bool(self.settings.get_auto_paste_prompt()))
 			cursor_layout.addWidget(auto_paste_cb)
+			open_mode_row = QtWidgets.QHBoxLayout()
+			open_mode_row.addWidget(QtWidgets.QLabel("Открывать проект:"))
+			open_mode_combo = QtWidgets.QComboBox()
+			open_modes = [("new_window", "в новом окне"), ("reuse_window", "в текущем окне"), ("add", "добавлять в рабочее пространство")]
+			for mode, title in open_modes:
+				open_mode_combo.addItem(title, mode)
+			current_mode = self.settings.settings.get("cursor_open_mode", "new_window")
+			open_mode_combo.setCurrentIndex(max(0, [m for m, _ in open_modes].index(current_mode) if current_mode in dict(open_modes) else 0))
+			open_mode_row.addWidget(open_mode_combo, 1)
+			cursor_layout.addLayout(open_mode_row)
 			layout.addWidget(grp_cursor)
 
+			# Очередь сборок — лимит параллельных задач
+			grp_queue = QtWidgets.QGroupBox("Очередь сборок")
+			queue_layout = QtWidgets.QHBoxLayout(grp_queue)
+			queue_layout.addWidget(QtWidgets.QLabel("Параллельных сборок:"))
+			parallel_spin = QtWidgets.QSpinBox()
+			parallel_spin.setRange(1, 50)
+			parallel_spin.setValue(self.max_parallel)
+			queue_layout.addWidget(parallel_spin)
+			layout.addWidget(grp_queue)
+
 			btns = QtWidgets.QHBoxLayout()
 			btn_ok = QtWidgets.QPushButton("Закрыть")
 			btns.addStretch(1)
@@ -824,6 +876,16 @@ class QtMainWindow(QtWidgets.QMainWindow):
 				self.settings.set_auto_paste_prompt(bool(checked))
 			auto_paste_cb.toggled.connect(_toggle_auto_paste)
 
+			def _change_open_mode(_index: int):
+				mode = open_mode_combo.currentData()
+				self.settings.set_value("cursor_open_mode", mode)
+			open_mode_combo.currentIndexChanged.connect(_change_open_mode)
+
+			def _change_parallel(value: int):
+				self.set_max_parallel(value)
+				self.settings.set_value("max_parallel_builds", int(value))
+			parallel_spin.valueChanged.connect(_change_parallel)
+
 			btn_ok.clicked.connect(dlg.accept)
 			dlg.exec()
 		except Exception as e:
@@ -957,7 +1019,7 @@ class QtMainWindow(QtWidgets.QMainWindow):
 
 	def _create_landing(self):
 		# Создание в фоне через очередь, чтобы ограничить параллелизм
-		self._start_build_task()
+		self._enqueue_build()
 
 	def _enqueue_build(self):
 		import threading
@@ -976,9 +1038,8 @@ class QtMainWindow(QtWidgets.QMainWindow):
 			"cancel_event": cancel_event,
 		}
 		self._job_seq += 1
-		self._build_queue.append(params)
+		self._scheduler.submit(params, self._run_build_job)
 		self._refresh_queue_ui()
-		self._start_build_task()
 
 		# Обновляем счётчик очереди
 		self._update_queue_label()
@@ -998,113 +1059,112 @@ class QtMainWindow(QtWidgets.QMainWindow):
 		except Exception:
 			return self.city or ""
 
-	def _start_build_task(self):
-		if self._active_builds >= self.max_parallel:
-			return
-		if not self._build_queue:
-			return
-		params = self._build_queue.pop(0)
-		self._active_builds += 1
-		self._active_jobs.append(params)
-		self.status_label.setText("🚧 Создание проекта и изображений...")
+	def set_max_parallel(self, value: int):
+		"""Меняет лимит параллельных сборок (действует на следующие задачи очереди)."""
+		self.max_parallel = max(1, int(value))
+		self._scheduler.set_max_workers(self.max_parallel)
 
-		def task():
-			try:
-				cancel = params.get("cancel_event")
-				zip_path = ensure_empty_zip_for_landing(params["save_path"], params["country"], params["theme"])
-				if zip_path:
-					print(f"ZIP создан: {zip_path}")
-				def progress_cb(text: str):
-					QtCore.QMetaObject.invokeMethod(
-						self.status_label, "setText", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, text)
-					)
-				# Генерация изображений возможна только при наличии API ключа
-				# В грид-режиме тоже генерируем изображения, если галочка не стоит и ключ задан
-				should_gen_images = (not params.get("no_images", False)) and bool(self.settings.get_ideogram_api_key())
-				# Имя папки формируется заранее при постановке задачи в очередь (folder_name),
-				# здесь просто добавляем порядковый id для уникальности
-				base_folder = params.get("folder_name") or params["domain"]
-				# Индекс добавляем только при необходимости (при коллизиях/дубликатах)
-				if params.get("needs_index"):
-					project_folder = f"{base_folder}_{params['id']}"
-				else:
-					project_folder = base_folder
-				project_path, media_path = self.cursor_manager.create_project_structure(
-					project_folder, params["save_path"], params["theme"], progress_cb, generate_images=should_gen_images, cancel_check=(lambda: bool(cancel.is_set())) if cancel else None
-				)
-				if cancel and cancel.is_set():
-					return
-				# Виджет пути перегенерации был удалён; больше не обновляем
-				language = params.get("language") or get_language_by_country(params["country"]) 
-				prompt = params.get("custom_prompt") or create_landing_prompt(params["country"], params["city"], language, params["domain"], params["theme"])
-				# Для грид-режима ничего не вставляем и не копируем; признак origin == 'grid'
-				origin = params.get("origin", "single")
-				do_copy = origin != "grid"
-				do_auto_paste = bool(params.get("auto_paste", False)) and origin != "grid"
-				if do_copy:
-					try:
-						QtWidgets.QApplication.clipboard().setText(prompt)
-					except Exception:
-						pass
-				success, message = self.cursor_manager.open_project_and_paste_prompt(
-					project_path, prompt, None, auto_paste=do_auto_paste
-				)
-				QtCore.QMetaObject.invokeMethod(
-					self, "_show_create_done", QtCore.Qt.QueuedConnection,
-					QtCore.Q_ARG(str, f"Проект: {project_path}\nMedia: {media_path}\n{message}"),
-					QtCore.Q_ARG(str, prompt),
-					QtCore.Q_ARG(str, params["domain"]),
-					QtCore.Q_ARG(str, params["theme"]) 
-				)
-			except Exception as e:
+	def _run_build_job(self, params: dict):
+		"""Сборка одного лендинга; выполняется в потоке пула планировщика."""
+		try:
+			def progress_cb(text: str):
 				QtCore.QMetaObject.invokeMethod(
-					self, "_show_create_error", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, str(e))
+					self.status_label, "setText", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, text)
 				)
-			finally:
-				QtCore.QMetaObject.invokeMethod(self, "_on_build_finished", QtCore.Qt.QueuedConnection)
+			# Генерация изображений возможна только при наличии API ключа
+			# В грид-режиме тоже генерируем изображения, если галочка не стоит и ключ задан
+			should_gen_images = (not params.get("no_images", False)) and bool(self.settings.get_ideogram_api_key())
+			built = build_landing(params, self.cursor_manager, should_gen_images, progress_cb, journal=params.get("journal"))
+			cancel_event = params.get("cancel_event")
+			if built["cancelled"] or (cancel_event is not None and cancel_event.is_set()):
+				# Отмена (или закрытие приложения) во время сборки — Cursor не открываем и ничего не вставляем
+				return
+			project_path, media_path, prompt = built["project_path"], built["media_path"], built["prompt"]
+			# Для грид-режима ничего не вставляем и не копируем; признак origin == 'grid'
+			origin = params.get("origin", "single")
+			do_copy = origin != "grid"
+			do_auto_paste = bool(params.get("auto_paste", False)) and origin != "grid"
+			if do_copy:
+				try:
+					QtWidgets.QApplication.clipboard().setText(prompt)
+				except Exception:
+					pass
+			success, message = self.cursor_manager.open_project_and_paste_prompt(
+				project_path, prompt, None, auto_paste=do_auto_paste
+			)
+			QtCore.QMetaObject.invokeMethod(
+				self, "_show_create_done", QtCore.Qt.QueuedConnection,
+				QtCore.Q_ARG(str, f"Проект: {project_path}\nMedia: {media_path}\n{message}"),
+				QtCore.Q_ARG(str, prompt),
+				QtCore.Q_ARG(str, params["domain"]),
+				QtCore.Q_ARG(str, params["theme"]),
+				# Версия и параметры шаблона — для компактной записи в историю (пусто для своего промпта)
+				QtCore.Q_ARG(str, built.get("prompt_template_version") or ""),
+				QtCore.Q_ARG(str, json.dumps(built.get("prompt_params") or {}, ensure_ascii=False)),
+			)
+		except Exception as e:
+			QtCore.QMetaObject.invokeMethod(
+				self, "_show_create_error", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, str(e))
+			)
 
-		worker = QtCore.QThread(self)
-		worker.run = task  # type: ignore
-		self._bg_threads.append(worker)
-		worker.finished.connect(lambda: self._bg_threads.remove(worker) if worker in self._bg_threads else None)
-		worker.start()
+	@QtCore.Slot(int)
+	def _on_build_started(self, job_id: int):
+		self.status_label.setText("🚧 Создание проекта и изображений...")
+		self._refresh_queue_ui()
 
-	@QtCore.Slot()
-	def _on_build_finished(self):
-		self._active_builds = max(0, self._active_builds - 1)
-		if self._active_jobs:
-			self._active_jobs.pop(0)
+	@QtCore.Slot(int)
+	def _on_build_finished(self, job_id: int):
+		self._refresh_queue_ui()
+		self._update_queue_label()
+		# Партия сетки закончилась — пул изображений больше не пополняем
+		if not any(p.get("origin") == "grid" for p in self._scheduler.active_jobs() + self._scheduler.queued_jobs()):
+			self.cursor_manager.stop_theme_prefetch()
+
+	def _offer_resume_batches(self):
+		try:
+			journals = find_unfinished_journals(self.path_edit.text().strip())
+		except Exception:
+			return
+		for journal in journals:
+			pending = journal.pending_jobs()
+			answer = QtWidgets.QMessageBox.question(
+				self, "Незавершённая партия",
+				f"В папке {journal.batch_dir} осталось незавершённых задач: {len(pending)}.\n"
+				"Продолжить? Готовые изображения будут использованы повторно.",
+				QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+			)
+			if answer != QtWidgets.QMessageBox.Yes:
+				# Отказ запоминаем в журнале — иначе вопрос повторялся бы при каждом запуске
+				journal.abandon_pending()
+				continue
+			for params in pending:
+				params.update({"id": self._job_seq, "journal": journal, "cancel_event": threading.Event()})
+				self._job_seq += 1
+				self._scheduler.submit(params, self._run_build_job)
 		self._refresh_queue_ui()
 		self._update_queue_label()
-		if self._build_queue:
-			self._start_build_task()
 
 	def _stop_all(self):
 		try:
 			# Ставим флаг отмены всем текущим и ожидающим задачам
-			for p in self._active_jobs + self._build_queue:
-				ce = p.get("cancel_event")
-				if ce:
-					try:
-						ce.set()
-					except Exception:
-						pass
+			self._scheduler.cancel_all()
+			self.cursor_manager.stop_theme_prefetch()
 			self.status_label.setText("⏹️ Очередь помечена на остановку")
 		except Exception:
 			pass
 
 	def _refresh_queue_ui(self):
 		items = []
-		for p in self._active_jobs:
+		for p in self._scheduler.active_jobs():
 			items.append(f"▶ {p['id']}: {p['domain']} [{p['theme']}] {'(без изображений)' if p.get('no_images') else ''}")
-		for p in self._build_queue:
+		for p in self._scheduler.queued_jobs():
 			items.append(f"⏳ {p['id']}: {p['domain']} [{p['theme']}] {'(без изображений)' if p.get('no_images') else ''}")
 		self.queue_list.clear()
 		self.queue_list.addItems(items)
 
 	def _update_queue_label(self):
 		try:
-			q_total = len(self._active_jobs) + len(self._build_queue)
+			q_total = self._scheduler.pending_count()
 			self.queue_label.setText(f"Очередь: {q_total}")
 		except Exception:
 			pass
@@ -1160,6 +1220,34 @@ class QtMainWindow(QtWidgets.QMainWindow):
 			domains_text = QtWidgets.QPlainTextEdit()
 			domains_text.setPlaceholderText("familykedx.org\nfrankjgoh.org\npuccinyomf.org\ncuekuth.org\nblockbzore.org")
 			right_v.addWidget(domains_text)
+			# Диагностика списка доменов по строкам (пересчёт после паузы в наборе)
+			domains_info = QtWidgets.QLabel("")
+			domains_info.setWordWrap(True)
+			domains_info.setStyleSheet("color:#94a3b8; font-size:12px;")
+			right_v.addWidget(domains_info)
+
+			def _update_domains_info():
+				checks = validate_domains(domains_text.toPlainText().splitlines())
+				bad = [c for c in checks if not c.ok]
+				dups = [c for c in checks if c.duplicate_of]
+				if not checks:
+					domains_info.setText("")
+					return
+				summary = f"Доменов: {len(checks)}"
+				if bad:
+					summary += f", ошибок: {len(bad)}"
+				if dups:
+					summary += f", повторов: {len(dups)}"
+				lines = [summary]
+				lines += [f"строка {c.line}: {c.raw} — {c.error}" for c in bad[:5]]
+				lines += [f"строка {c.line}: {c.domain} повторяет строку {c.duplicate_of}" for c in dups[:3]]
+				domains_info.setText("\n".join(lines))
+
+			domains_timer = QtCore.QTimer(dlg)
+			domains_timer.setSingleShot(True)
+			domains_timer.setInterval(200)
+			domains_timer.timeout.connect(_update_domains_info)
+			domains_text.textChanged.connect(domains_timer.start)
 			inputs.addWidget(left_box, 1)
 			inputs.addWidget(right_box, 1)
 			v.addLayout(inputs)
@@ -1238,19 +1326,23 @@ class QtMainWindow(QtWidgets.QMainWindow):
 				# Валидируем домены и считаем повторы
 				validated = []  # (theme, fixed_domain)
 				domain_counts = {}
+				# Каждый уникальный домен проверяется один раз, даже если он повторяется для многих тематик
+				checks = {c.raw: c for c in validate_domains(dict.fromkeys(d for _, d in raw_pairs))}
 				for t, d in raw_pairs:
-					ok, err, fixed = validate_domain(d)
-					if not ok:
-						self.status_label.setText(f"⚠️ Пропуск '{d}': {err}")
+					check = checks[d]
+					if not check.ok:
+						self.status_label.setText(f"⚠️ Пропуск '{d}': {check.error}")
 						continue
-					validated.append((t, fixed))
-					domain_counts[fixed] = domain_counts.get(fixed, 0) + 1
+					validated.append((t, check.domain))
+					domain_counts[check.domain] = domain_counts.get(check.domain, 0) + 1
 				if not validated:
 					QtWidgets.QMessageBox.warning(self, "Режим сетки", "После валидации доменов задач не осталось")
 					return
 				# Создаём задачи: добавляем тематику к имени папки только если домен повторяется
 				# и включаем индексацию только если есть потенциальные коллизии имён
 				needs_index_global = any(cnt >= 2 for cnt in domain_counts.values())
+				# Журнал партии: после падения/закрытия партию можно продолжить с места остановки
+				journal = JobJournal(batch_dir)
 				for theme, fixed_domain in validated:
 					# Убираем звёздочку из названия страны (визуальный маркер избранного)
 					clean_country = country.replace('★', '').strip()
@@ -1273,12 +1365,17 @@ class QtMainWindow(QtWidgets.QMainWindow):
 						"id": self._job_seq,
 						"auto_paste": False,
 						"origin": "grid",
-						"needs_index": needs_index
+						"needs_index": needs_index,
+						"cancel_event": threading.Event(),
+						"journal": journal,
 					}
 					self._job_seq += 1
-					self._build_queue.append(params)
+					journal.record_job(params)
+					self._scheduler.submit(params, self._run_build_job)
+				# Пул предзаготовки: наборы изображений по тематикам готовятся в фоне
+				if not no_images_cb.isChecked():
+					self.cursor_manager.prefetch_theme_images([t for t, _ in validated])
 				self._refresh_queue_ui()
-				self._start_build_task()
 				self._update_queue_label()
 				dlg.accept()
 
@@ -1367,13 +1464,19 @@ class QtMainWindow(QtWidgets.QMainWindow):
 		except Exception:
 			pass
 
-	@QtCore.Slot(str, str, str, str)
-	def _show_create_done(self, message: str, prompt: str, domain: str, theme: str):
+	@QtCore.Slot(str, str, str, str, str, str)
+	def _show_create_done(self, message: str, prompt: str, domain: str, theme: str, template_version: str = "", prompt_params: str = "{}"):
 		QtWidgets.QMessageBox.information(self, "Готово", message)
 		# сохранение истории — для многопоточности фиксируем текущее состояние домена/темы
 		try:
 			self.settings.add_theme_to_history(theme)
-			self.settings.add_landing_to_history(domain, prompt)
+			params = json.loads(prompt_params or "{}")
+			# Шаблон — ровно та версия, по которой собран промпт (даже если файл уже перечитан)
+			template = get_landing_template(template_version) if template_version and params else None
+			self.settings.add_landing_to_history(
+				domain, prompt, theme,
+				template=template, prompt_params=params if template else None,
+			)
 		except Exception:
 			pass
 		self._load_initial_state()
@@ -1452,10 +1555,16 @@ def run_qt():
 	app.processEvents()
 
 	w = QtMainWindow()
+	startup_profile.mark("главное окно создано")
 
 	def _finish():
 		w.show()
 		splash.finish(w)
+		startup_profile.finish()
 
 	QtCore.QTimer.singleShot(700, _finish)
+	# Потоки сборок и предзаготовки не демоны: без отмены выход ждал бы платных генераций,
+	# а сборки открывали бы Cursor и вставляли промпт уже без окна приложения
+	app.aboutToQuit.connect(lambda: w._scheduler.shutdown(wait=False))
+	app.aboutToQuit.connect(lambda: w.cursor_manager.stop_theme_prefetch(shutdown=True))
 	app.exec()
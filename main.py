@@ -13,14 +13,21 @@
 - Проверка существования папок
 """
 
+import multiprocessing
 import sys
-from gui.qt_main import run_qt
+
+from core import startup_profile
 
 
 def main():
     """Точка входа: только Qt-версия (PySide6)."""
     print("🚀 Запуск Генератора Лендингов v2.0 (Qt)...")
+    startup_profile.enable_if_requested()
     try:
+        # GUI импортируется здесь, а не на уровне модуля: дочерние процессы пула
+        # пост-обработки (multiprocessing) не должны тянуть за собой PySide6
+        from gui.qt_main import run_qt
+        startup_profile.mark("модули GUI загружены")
         run_qt()
         return 0
     except Exception as e:
@@ -30,4 +37,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Нужно для пула пост-обработки изображений в собранном EXE (PyInstaller)
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
@@ -10,7 +10,9 @@ import os
 import re
 import subprocess
 import sys
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 messagebox = None  # Tkinter удалён
 
 def get_current_year():
@@ -22,10 +24,35 @@ def get_current_year():
     """
     return datetime.datetime.now().year
 
+# Похожие кириллические символы -> латинские (набор в другой раскладке)
+_CYRILLIC_TO_LATIN = str.maketrans({
+    'а': 'a', 'А': 'A',
+    'е': 'e', 'Е': 'E',
+    'о': 'o', 'О': 'O',
+    'р': 'p', 'Р': 'P',
+    'с': 'c', 'С': 'C',
+    'у': 'u', 'У': 'U',
+    'х': 'x', 'Х': 'X',
+    'м': 'm', 'М': 'M',
+    'н': 'n', 'Н': 'N',
+    'к': 'k', 'К': 'K',
+    'т': 't', 'Т': 'T',
+})
+
+# Формат домена: метки до 63 символов, TLD — буквы или punycode (xn--...)
+_DOMAIN_RE = re.compile(
+    r'^[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*'
+    r'\.([a-zA-Z]{2,}|[xX][nN]--[a-zA-Z0-9\-]{1,59})$'
+)
+
+
 def validate_domain(domain):
     """
     Проверяет корректность доменного имени и исправляет кириллические символы
     
+    Кириллица, похожая на латиницу, заменяется латиницей; настоящие
+    IDN-домены (например, сайт.рф) переводятся в punycode.
+    
     Args:
         domain (str): Доменное имя для проверки
         
@@ -41,34 +68,65 @@ def validate_domain(domain):
     if len(domain) > 253:
         return False, "Доменное имя слишком длинное (максимум 253 символа)", domain
     
-    # Автоматическая замена похожих кириллических символов на латинские
-    cyrillic_to_latin = {
-        'а': 'a', 'А': 'A',
-        'е': 'e', 'Е': 'E', 
-        'о': 'o', 'О': 'O',
-        'р': 'p', 'Р': 'P',
-        'с': 'c', 'С': 'C',
-        'у': 'u', 'У': 'U',
-        'х': 'x', 'Х': 'X',
-        'м': 'm', 'М': 'M',
-        'н': 'n', 'Н': 'N',
-        'к': 'k', 'К': 'K',
-        'т': 't', 'Т': 'T'
-    }
-    
     # Заменяем кириллические символы на латинские
-    corrected_domain = domain
-    for cyrillic, latin in cyrillic_to_latin.items():
-        corrected_domain = corrected_domain.replace(cyrillic, latin)
+    corrected_domain = domain.translate(_CYRILLIC_TO_LATIN)
     
-    # Проверяем формат домена
-    domain_pattern = r'^[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*\.[a-zA-Z]{2,}$'
+    if not corrected_domain.isascii():
+        # Остались не-ASCII символы — это IDN, а не опечатка раскладки
+        try:
+            corrected_domain = domain.lower().encode("idna").decode("ascii")
+        except UnicodeError:
+            return False, "Некорректное интернационализированное доменное имя", domain
+        if len(corrected_domain) > 253:
+            return False, "Доменное имя слишком длинное (максимум 253 символа)", corrected_domain
     
-    if not re.match(domain_pattern, corrected_domain):
+    # Проверяем формат домена
+    if not _DOMAIN_RE.match(corrected_domain):
         return False, "Некорректный формат доменного имени", corrected_domain
     
     return True, "", corrected_domain
 
+
+@dataclass(frozen=True)
+class DomainCheck:
+    """Результат проверки одной строки списка доменов"""
+    line: int  # номер строки (с 1)
+    raw: str
+    ok: bool
+    error: str
+    domain: str  # исправленный домен (punycode для IDN)
+    duplicate_of: Optional[int] = None  # строка первого вхождения того же домена
+
+
+def validate_domains(lines):
+    """
+    Проверяет список доменов за один вызов (вставка списка в режим сетки)
+    
+    Пустые строки пропускаются; повторы определяются без учёта регистра
+    по исправленному домену.
+    
+    Args:
+        lines (Iterable[str]): Строки с доменами
+        
+    Returns:
+        list[DomainCheck]: Результат по каждой непустой строке
+    """
+    results = []
+    first_seen = {}
+    for line_no, raw in enumerate(lines, start=1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        ok, error, fixed = validate_domain(raw)
+        duplicate_of = None
+        if ok:
+            key = fixed.lower()
+            duplicate_of = first_seen.setdefault(key, line_no)
+            if duplicate_of == line_no:
+                duplicate_of = None
+        results.append(DomainCheck(line_no, raw, ok, error, fixed, duplicate_of))
+    return results
+
 def check_directory_exists(path, domain):
     """
     Проверяет существование директории проекта
@@ -0,0 +1,308 @@
+"""
+Хранилище истории лендингов (SQLite)
+Вынесено из файла настроек: запуск и сохранение настроек не зависят от размера истории
+
+Промпты из шаблона хранятся дельтой: текст шаблона — один раз на версию,
+у записи — только версия и значения слотов; полный промпт собирается при чтении.
+Пользовательские промпты сжимаются (zstd, если установлен, иначе zlib).
+"""
+
+import json
+import os
+import sqlite3
+import zlib
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Сколько записей хранить (старые удаляются); 0 — без ограничения
+DEFAULT_MAX_ENTRIES = 5000
+# Проверка лимита — раз в столько добавлений, а не на каждое
+RETENTION_CHECK_EVERY = 50
+
+SCHEMA_VERSION = 3
+# Обслуживание базы (compact) — не чаще раза в столько дней, при открытии хранилища; 0 — выкл.
+DEFAULT_COMPACT_INTERVAL_DAYS = 7
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+def _compress(text: str) -> Tuple[bytes, str]:
+    raw = text.encode("utf-8")
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=10).compress(raw), "zstd"
+    return zlib.compress(raw, 6), "zlib"
+
+
+def _decompress(blob: bytes, codec: str) -> str:
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def default_history_path() -> Path:
+    return Path(os.environ.get("LANDGEN_HISTORY_DB", Path.home() / ".landing_generator_history.sqlite3"))
+
+
+class HistoryStore:
+    """История сгенерированных лендингов: постраничная выдача, поиск по домену/тематике, лимит записей"""
+
+    def __init__(self, db_path=None, max_entries: int = DEFAULT_MAX_ENTRIES, compact_interval_days: Optional[float] = None):
+        self.db_path = Path(db_path) if db_path else default_history_path()
+        self.max_entries = max(0, int(max_entries))
+        self._lock = threading.Lock()
+        self._inserts_since_check = 0
+        # Скомпилированные шаблоны по версии (для сборки промптов при чтении)
+        self._templates: Dict[str, object] = {}
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            pass
+        self._migrate()
+        if compact_interval_days is None:
+            try:
+                compact_interval_days = float(os.environ.get("LANDGEN_HISTORY_COMPACT_DAYS", DEFAULT_COMPACT_INTERVAL_DAYS))
+            except ValueError:
+                compact_interval_days = DEFAULT_COMPACT_INTERVAL_DAYS
+        self._maybe_compact(compact_interval_days)
+
+    def _migrate(self):
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                self._conn.executescript(
+                    """
+                    CREATE TABLE IF NOT EXISTS landings (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        domain TEXT NOT NULL,
+                        theme TEXT NOT NULL DEFAULT '',
+                        prompt TEXT NOT NULL DEFAULT '',
+                        ts INTEGER NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_landings_domain ON landings(domain);
+                    CREATE INDEX IF NOT EXISTS idx_landings_theme ON landings(theme);
+                    """
+                )
+            if version < 2:
+                # Дельта-хранение: шаблоны отдельно, у записи — версия шаблона и параметры
+                self._conn.executescript(
+                    """
+                    CREATE TABLE IF NOT EXISTS templates (
+                        version TEXT PRIMARY KEY,
+                        source TEXT NOT NULL
+                    );
+                    ALTER TABLE landings ADD COLUMN template_version TEXT;
+                    ALTER TABLE landings ADD COLUMN params TEXT;
+                    ALTER TABLE landings ADD COLUMN prompt_blob BLOB;
+                    ALTER TABLE landings ADD COLUMN prompt_codec TEXT;
+                    """
+                )
+            if version < 3:
+                # Служебные значения (время последнего обслуживания)
+                self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def add(self, domain: str, prompt: str, theme: Optional[str] = None, ts: Optional[int] = None,
+            template=None, params: Optional[dict] = None) -> int:
+        """
+        Добавляет запись и возвращает её id
+
+        Args:
+            template (PromptTemplate): Шаблон, из которого получен prompt
+            params (dict): Значения слотов шаблона; если template.render(**params) совпадает
+                с prompt, хранится только дельта, иначе — сжатый текст
+        """
+        template_version, params_json, blob, codec = None, None, None, None
+        if template is not None and params is not None:
+            try:
+                if template.render(**params) == (prompt or ""):
+                    template_version = template.version
+                    params_json = json.dumps(params, ensure_ascii=False, sort_keys=True)
+            except Exception:
+                template_version = None
+        if template_version is None and prompt:
+            blob, codec = _compress(prompt)
+        with self._lock, self._conn:
+            if template_version is not None:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO templates(version, source) VALUES (?, ?)", (template_version, template.source)
+                )
+                self._templates.setdefault(template_version, template)
+            cur = self._conn.execute(
+                "INSERT INTO landings(domain, theme, prompt, ts, template_version, params, prompt_blob, prompt_codec)"
+                " VALUES (?, ?, '', ?, ?, ?, ?, ?)",
+                ((domain or "").strip(), (theme or "").strip(), int(ts if ts is not None else time.time()),
+                 template_version, params_json, blob, codec),
+            )
+            self._inserts_since_check += 1
+            if self._inserts_since_check >= RETENTION_CHECK_EVERY:
+                self._inserts_since_check = 0
+                self._apply_retention()
+            return cur.lastrowid
+
+    def _template(self, version: str):
+        # Вызывается под self._lock
+        template = self._templates.get(version)
+        if template is None:
+            row = self._conn.execute("SELECT source FROM templates WHERE version = ?", (version,)).fetchone()
+            if row is None:
+                return None
+            from generators.prompt_template import PromptTemplate
+            template = PromptTemplate(row[0], name=f"history:{version}")
+            self._templates[version] = template
+        return template
+
+    def _prompt_of(self, row) -> str:
+        # Вызывается под self._lock
+        try:
+            if row["template_version"]:
+                template = self._template(row["template_version"])
+                if template is not None:
+                    return template.render(**json.loads(row["params"]))
+            if row["prompt_blob"] is not None:
+                return _decompress(row["prompt_blob"], row["prompt_codec"])
+        except Exception as e:
+            print(f"⚠️ История: не удалось восстановить промпт #{row['id']}: {e}")
+        return row["prompt"] or ""
+
+    def import_entries(self, entries: Iterable[dict]) -> int:
+        """
+        Переносит записи старого формата ({domain, prompt, ts[, theme]}) одной транзакцией
+
+        Значения приводятся к строкам/числам; записи, уже лежащие в базе (тот же домен и ts),
+        пропускаются — перенос можно повторить или слить с непустой историей
+        """
+        rows = []
+        for e in entries:
+            if not isinstance(e, dict):
+                continue
+            prompt = e.get("prompt")
+            prompt = "" if prompt is None else str(prompt)
+            try:
+                ts = int(float(e.get("ts") or 0))
+            except (TypeError, ValueError):
+                ts = 0
+            blob, codec = _compress(prompt) if prompt else (None, None)
+            rows.append((str(e.get("domain") or "").strip(), str(e.get("theme") or "").strip(), ts, blob, codec))
+        # Старый список хранился от новых к старым — вставляем в хронологическом порядке
+        rows.reverse()
+        with self._lock, self._conn:
+            existing = {
+                (domain, ts) for domain, ts in self._conn.execute("SELECT domain, ts FROM landings").fetchall()
+            } if rows else set()
+            rows = [row for row in rows if (row[0], row[2]) not in existing]
+            self._conn.executemany(
+                "INSERT INTO landings(domain, theme, prompt, ts, prompt_blob, prompt_codec) VALUES (?, ?, '', ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    @staticmethod
+    def _where(query: Optional[str]):
+        query = (query or "").strip()
+        if not query:
+            return "", ()
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        return " WHERE domain LIKE ? ESCAPE '\\' OR theme LIKE ? ESCAPE '\\'", (pattern, pattern)
+
+    def page(self, offset: int = 0, limit: int = 10, query: Optional[str] = None) -> List[dict]:
+        """Записи от новых к старым, с фильтром по подстроке домена/тематики"""
+        where, args = self._where(query)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, domain, theme, prompt, ts, template_version, params, prompt_blob, prompt_codec"
+                f" FROM landings{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                (*args, int(limit), int(offset)),
+            ).fetchall()
+            return [
+                {"id": row["id"], "domain": row["domain"], "theme": row["theme"], "prompt": self._prompt_of(row), "ts": row["ts"]}
+                for row in rows
+            ]
+
+    def count(self, query: Optional[str] = None) -> int:
+        where, args = self._where(query)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM landings{where}", args).fetchone()[0]
+
+    def _apply_retention(self) -> int:
+        if not self.max_entries:
+            return 0
+        cur = self._conn.execute(
+            "DELETE FROM landings WHERE id <= (SELECT id FROM landings ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        return cur.rowcount
+
+    def compact(self) -> int:
+        """
+        Применяет лимит записей, сжимает несжатые промпты, удаляет неиспользуемые шаблоны
+        и уплотняет файл базы. Возвращает число удалённых записей
+        """
+        with self._lock:
+            with self._conn:
+                removed = self._apply_retention()
+                plain = self._conn.execute(
+                    "SELECT id, prompt FROM landings WHERE prompt != '' AND prompt_blob IS NULL AND template_version IS NULL"
+                ).fetchall()
+                for row in plain:
+                    blob, codec = _compress(row["prompt"])
+                    self._conn.execute(
+                        "UPDATE landings SET prompt = '', prompt_blob = ?, prompt_codec = ? WHERE id = ?", (blob, codec, row["id"])
+                    )
+                self._conn.execute(
+                    "DELETE FROM templates WHERE version NOT IN"
+                    " (SELECT DISTINCT template_version FROM landings WHERE template_version IS NOT NULL)"
+                )
+                self._templates.clear()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta(key, value) VALUES ('last_compact', ?)", (str(time.time()),)
+                )
+            self._conn.execute("VACUUM")
+        return removed
+
+    def _maybe_compact(self, interval_days: float):
+        """Запускает compact в фоне, если с прошлого обслуживания прошло больше interval_days"""
+        if not interval_days or interval_days <= 0:
+            return
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'last_compact'").fetchone()
+        try:
+            last = float(row[0]) if row else 0.0
+        except (TypeError, ValueError):
+            last = 0.0
+        if time.time() - last < interval_days * 86400:
+            return
+
+        def _run():
+            try:
+                removed = self.compact()
+                if removed:
+                    print(f"🧹 История лендингов: удалено старых записей: {removed}")
+            except Exception as e:
+                print(f"⚠️ История лендингов: обслуживание базы не выполнено: {e}")
+
+        threading.Thread(target=_run, name="history-compact", daemon=True).start()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_history_store(max_entries: Optional[int] = None) -> HistoryStore:
+    """Возвращает общее для процесса хранилище истории"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore(max_entries=DEFAULT_MAX_ENTRIES if max_entries is None else max_entries)
+        return _store
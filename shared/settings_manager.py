@@ -3,9 +3,28 @@
 Выделен из utils.py для лучшей организации
 """
 
+import atexit
 import json
 import os
+import tempfile
+import threading
+import weakref
 from pathlib import Path
+from types import MappingProxyType
+
+# Изменения настроек копятся и записываются на диск не чаще, чем раз в SAVE_DEBOUNCE_SECONDS
+SAVE_DEBOUNCE_SECONDS = 1.0
+
+# Менеджеры с незаписанными изменениями — дописываются при выходе из приложения
+_dirty_managers = weakref.WeakSet()
+
+
+def _flush_all():
+    for manager in list(_dirty_managers):
+        manager.flush()
+
+
+atexit.register(_flush_all)
 
 def get_desktop_path():
     """
@@ -48,15 +67,61 @@ def get_desktop_path():
         print(f"Ошибка определения рабочего стола: {e}")
         return Path.home() / "Desktop"
 
+def _freeze(value):
+    """Рекурсивная неизменяемая копия: dict -> MappingProxyType, list -> tuple"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _atomic_write_json(path, data):
+    """Пишет JSON во временный файл рядом и заменяет им целевой (без полузаписанных файлов)"""
+    path = Path(path)
+    payload = json.dumps(data, ensure_ascii=False, indent=2)
+    # Уникальное имя: параллельные записи (настройки и локатор, разные менеджеры) не делят временный файл
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
 class SettingsManager:
     """Менеджер настроек программы"""
     
     def __init__(self):
         # Файл-локатор, который указывает где хранится основной файл настроек
         self.locator_file = Path.home() / ".landing_generator_settings_locator.json"
+        # Путь, записанный в локаторе (локатор перезаписывается только при его смене)
+        self._locator_path = None
+        # Отложенная запись (write-behind): таймер + флаг несохранённых изменений
+        self._save_lock = threading.RLock()
+        self._save_timer = None
+        self._dirty = False
+        self._history_store = None
+        # Copy-on-write: писатели под _write_lock собирают новый словарь и атомарно
+        # подменяют self.settings и снимок; читатели берут снимок без блокировок
+        self._write_lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+        self._subscribers = []
         # Определяем путь к файлу настроек: из локатора или по умолчанию
         self.settings_file = self._resolve_settings_file_path()
         self.settings = self.load_settings()
+        self._snapshot = _freeze(self.settings)
+        if not self.settings_file.exists():
+            # Создаем файл с дефолтными настройками
+            self.save_settings()
     
     def _resolve_settings_file_path(self) -> Path:
         """Определяет путь к файлу настроек, читая локатор, если он существует."""
@@ -67,6 +132,7 @@ class SettingsManager:
                     data = _json.load(f) or {}
                     p = data.get("settings_path")
                     if p:
+                        self._locator_path = p
                         sp = Path(p)
                         # Если путь существует (или хотя бы директория существует) — используем
                         if sp.exists() or sp.parent.exists():
@@ -77,11 +143,12 @@ class SettingsManager:
         return Path.home() / "landing_generator_settings.json"
 
     def _save_locator(self):
-        """Сохраняет файл-локатор с текущим путём к настройкам."""
+        """Сохраняет файл-локатор с текущим путём к настройкам (только если путь изменился)."""
+        if self._locator_path == str(self.settings_file) and self.locator_file.exists():
+            return
         try:
-            with open(self.locator_file, 'w', encoding='utf-8') as f:
-                import json as _json
-                _json.dump({"settings_path": str(self.settings_file)}, f, ensure_ascii=False, indent=2)
+            _atomic_write_json(self.locator_file, {"settings_path": str(self.settings_file)})
+            self._locator_path = str(self.settings_file)
         except Exception as _e:
             print(f"⚠️ Не удалось сохранить локатор настроек: {_e}")
 
@@ -94,15 +161,24 @@ class SettingsManager:
             "last_save_path": str(get_desktop_path()),
             "custom_prompt": "",
             "last_selected_country": "",
-            "landing_history": [],  # [{"domain": str, "prompt": str, "ts": int}]
+            # История лендингов хранится отдельно (shared/history_store.py)
+            "history_max_entries": 5000,
             "auto_check_updates": True,
             "last_update_sha": "",
             # Настройки Ideogram
             "ideogram_model": "3.0 Turbo",
             "ideogram_magic_prompt_option": "OFF",  # OFF | AUTO | ON
             "ideogram_api_key": "",
+            "ideogram_max_concurrency": 4,  # сколько изображений лендинга генерировать одновременно
+            "ideogram_batch_mode": False,  # about/gallery — одним запросом на семейство (num_images>1)
+            "image_cache_enabled": True,  # кэш готовых изображений по промпту/параметрам
+            "image_cache_max_mb": 500,
+            "image_prefetch_sets_per_theme": 0,  # пул готовых наборов на тематику в режиме сетки (0 — выкл., платно)
             # Поведение Cursor
             "auto_paste_prompt": True,
+            "cursor_open_mode": "new_window",  # new_window | reuse_window | add (CLI --reuse-window / --add)
+            # Очередь сборок
+            "max_parallel_builds": 10,
         }
         
         print(f"🔍 Загрузка настроек из: {self.settings_file}")
@@ -118,8 +194,6 @@ class SettingsManager:
                 print(f"📝 Тематик в истории: {len(default_settings['theme_history'])}")
             else:
                 print(f"ℹ️ Файл настроек не найден, используются значения по умолчанию")
-                # Создаем файл и локатор с дефолтными настройками
-                self.save_settings()
                 self._save_locator()
                     
         except Exception as e:
@@ -127,40 +201,156 @@ class SettingsManager:
         
         return default_settings
     
+    def update(self, values=None, remove=()):
+        """
+        Атомарно меняет настройки (copy-on-write) и планирует запись на диск
+
+        Args:
+            values (dict): Новые значения ключей
+            remove (iterable): Ключи, которые нужно удалить
+
+        Returns:
+            int: Новая версия настроек
+        """
+        with self._write_lock:
+            new_settings = dict(self.settings)
+            new_settings.update(values or {})
+            for key in remove:
+                new_settings.pop(key, None)
+            self._publish(new_settings)
+            version = self._version
+        self._schedule_save()
+        return version
+
+    def update_with(self, fn):
+        """
+        Атомарное чтение-изменение-запись: fn(current) вызывается под блокировкой писателей
+
+        Args:
+            fn (callable): fn(current) -> dict изменённых ключей или None (ничего не менять);
+                current — текущий словарь настроек (только для чтения)
+
+        Returns:
+            int: Версия настроек после вызова
+        """
+        with self._write_lock:
+            changes = fn(self.settings)
+            if changes:
+                new_settings = dict(self.settings)
+                new_settings.update(changes)
+                self._publish(new_settings)
+            version = self._version
+        if changes:
+            self._schedule_save()
+        return version
+
+    def set_value(self, key, value):
+        """Меняет одно значение настройки (см. update)"""
+        return self.update({key: value})
+
+    @property
+    def version(self) -> int:
+        """Номер версии настроек (растёт при каждом изменении)"""
+        return self._version
+
+    def _publish(self, new_settings):
+        # Вызывается под _write_lock: опубликованный словарь больше не изменяется на месте,
+        # поэтому его можно сериализовать в фоне без «dictionary changed size during iteration»
+        self.settings = new_settings
+        self._snapshot = _freeze(new_settings)
+        self._version += 1
+
     def save_settings(self):
-        """Сохраняет настройки в файл"""
-        try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, ensure_ascii=False, indent=2)
-            print(f"✅ Настройки сохранены в: {self.settings_file}")
-            # Обновляем локатор на всякий случай
-            self._save_locator()
-            
-        except Exception as e:
-            print(f"❌ Ошибка сохранения настроек: {e}")
+        """
+        Фиксирует текущие настройки и планирует запись на диск
+
+        Частые изменения (история в режиме сетки и т.п.) объединяются в одну запись
+        через SAVE_DEBOUNCE_SECONDS; несохранённое дописывается при выходе (flush).
+        Для изменений используйте update/set_value/update_with; прямое изменение self.settings
+        с последующим save_settings() поддерживается для совместимости.
+        """
+        with self._write_lock:
+            self._publish(dict(self.settings))
+        self._schedule_save()
+
+    def _schedule_save(self):
+        with self._save_lock:
+            self._dirty = True
+            _dirty_managers.add(self)
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+        self._notify_subscribers()
+
+    def snapshot(self):
+        """
+        Неизменяемый снимок настроек (без чтения с диска и без блокировок)
+
+        Рабочие потоки сборок читают настройки отсюда; каждое изменение
+        публикует новый снимок целиком.
+        """
+        return self._snapshot
+
+    def subscribe(self, callback):
+        """Подписка на изменения: callback(snapshot) вызывается после каждого изменения"""
+        with self._save_lock:
+            self._subscribers.append(callback)
+
+    def _notify_subscribers(self):
+        with self._save_lock:
+            subscribers = list(self._subscribers)
+        snapshot = self._snapshot
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"⚠️ Ошибка обработчика изменения настроек: {e}")
+
+    def flush(self):
+        """Немедленно записывает несохранённые изменения (атомарно: временный файл + rename)"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            _dirty_managers.discard(self)
+            try:
+                # Опубликованный словарь неизменяем — сериализуем его без копирования
+                _atomic_write_json(self.settings_file, self.settings)
+                print(f"✅ Настройки сохранены в: {self.settings_file}")
+                self._save_locator()
+            except Exception as e:
+                print(f"❌ Ошибка сохранения настроек: {e}")
     
     def add_favorite_country(self, country):
         """Добавляет страну в избранные"""
-        if country not in self.settings["favorite_countries"]:
-            self.settings["favorite_countries"].insert(0, country)
-            # Ограничиваем количество избранных
-            self.settings["favorite_countries"] = self.settings["favorite_countries"][:10]
-            self.save_settings()
+        def _add(current):
+            favorites = current["favorite_countries"]
+            if country not in favorites:
+                # Ограничиваем количество избранных
+                return {"favorite_countries": ([country] + list(favorites))[:10]}
+        self.update_with(_add)
     
     def remove_favorite_country(self, country):
         """Удаляет страну из избранных"""
-        if country in self.settings["favorite_countries"]:
-            self.settings["favorite_countries"].remove(country)
-            self.save_settings()
+        def _remove(current):
+            favorites = current["favorite_countries"]
+            if country in favorites:
+                return {"favorite_countries": [c for c in favorites if c != country]}
+        self.update_with(_remove)
     
     def add_theme_to_history(self, theme):
         """Добавляет тематику в историю"""
         theme = theme.strip()
-        if theme and theme not in self.settings["theme_history"]:
-            self.settings["theme_history"].insert(0, theme)
-            # Ограничиваем историю до 10 элементов
-            self.settings["theme_history"] = self.settings["theme_history"][:10]
-            self.save_settings()
+        def _add(current):
+            history = current["theme_history"]
+            if theme and theme not in history:
+                # Ограничиваем историю до 10 элементов
+                return {"theme_history": ([theme] + list(history))[:10]}
+        self.update_with(_add)
     
     def get_favorite_countries(self):
         """Возвращает список избранных стран"""
@@ -172,8 +362,7 @@ class SettingsManager:
     
     def set_save_path(self, path):
         """Устанавливает путь для сохранения"""
-        self.settings["last_save_path"] = str(path)
-        self.save_settings()
+        self.set_value("last_save_path", str(path))
     
     def get_save_path(self):
         """Возвращает последний путь для сохранения"""
@@ -181,8 +370,7 @@ class SettingsManager:
 
     def save_prompt(self, prompt):
         """Сохраняет пользовательский промпт"""
-        self.settings["custom_prompt"] = prompt
-        self.save_settings()
+        self.set_value("custom_prompt", prompt)
         
     def get_prompt(self):
         """Возвращает сохраненный промпт"""
@@ -190,44 +378,72 @@ class SettingsManager:
     
     def set_last_selected_country(self, country):
         """Сохраняет последнюю выбранную страну"""
-        self.settings["last_selected_country"] = country
-        self.save_settings()
+        self.set_value("last_selected_country", country)
         print(f"💾 Сохранена последняя выбранная страна: {country}")
     
     def get_last_selected_country(self):
         """Возвращает последнюю выбранную страну"""
         return self.settings.get("last_selected_country", "") 
 
-    # --- История последних лендингов ---
-    def add_landing_to_history(self, domain: str, prompt: str):
+    # --- История последних лендингов (SQLite, см. shared/history_store.py) ---
+    def _history(self):
+        if self._history_store is None:
+            from .history_store import get_history_store
+            store = get_history_store(self.settings.get("history_max_entries"))
+            # Перенос истории старого формата из файла настроек: записи сливаются с базой,
+            # ключ удаляется только после успешного переноса (при ошибке повторим при следующем запуске)
+            legacy = self.settings.get("landing_history")
+            if legacy is not None:
+                try:
+                    moved = store.import_entries(legacy if isinstance(legacy, list) else [])
+                except Exception as e:
+                    print(f"⚠️ Не удалось перенести историю лендингов, она останется в настройках: {e}")
+                else:
+                    self.update(remove=("landing_history",))
+                    if moved:
+                        print(f"📦 История лендингов перенесена в {store.db_path}: {moved}")
+            self._history_store = store
+        return self._history_store
+
+    def add_landing_to_history(self, domain: str, prompt: str, theme: str = None, template=None, prompt_params: dict = None):
+        """
+        Добавляет лендинг в историю
+
+        Если промпт получен из шаблона (template + prompt_params), хранится только
+        версия шаблона и параметры — полный текст собирается при чтении.
+        """
         try:
-            from time import time
-            entry = {"domain": domain.strip(), "prompt": prompt or "", "ts": int(time())}
-            hist = self.settings.get("landing_history", [])
             # сохраняем все записи, даже с одинаковым доменом (не теряем промпты)
-            hist.insert(0, entry)
-            self.settings["landing_history"] = hist[:10]
-            self.save_settings()
+            self._history().add(domain, prompt, theme, template=template, params=prompt_params)
         except Exception as e:
             print(f"❌ Ошибка обновления истории лендингов: {e}")
 
-    def get_landing_history(self):
-        return self.settings.get("landing_history", [])
+    def get_landing_history(self, limit: int = 10, offset: int = 0, query: str = None):
+        """Страница истории от новых к старым; query — подстрока домена или тематики"""
+        try:
+            return self._history().page(offset, limit, query)
+        except Exception as e:
+            print(f"❌ Ошибка чтения истории лендингов: {e}")
+            return []
+
+    def count_landing_history(self, query: str = None) -> int:
+        try:
+            return self._history().count(query)
+        except Exception:
+            return 0
 
     # --- Обновления ---
     def get_auto_check_updates(self) -> bool:
         return bool(self.settings.get("auto_check_updates", True))
 
     def set_auto_check_updates(self, value: bool):
-        self.settings["auto_check_updates"] = bool(value)
-        self.save_settings()
+        self.set_value("auto_check_updates", bool(value))
 
     def get_last_update_sha(self) -> str:
         return self.settings.get("last_update_sha", "")
 
     def set_last_update_sha(self, sha: str):
-        self.settings["last_update_sha"] = sha or ""
-        self.save_settings()
+        self.set_value("last_update_sha", sha or "")
 
     # --- Ideogram API key ---
     def get_ideogram_api_key(self) -> str:
@@ -237,8 +453,7 @@ class SettingsManager:
             return ""
 
     def set_ideogram_api_key(self, api_key: str):
-        self.settings["ideogram_api_key"] = (api_key or "").strip()
-        self.save_settings()
+        self.set_value("ideogram_api_key", (api_key or "").strip())
 
     # --- Cursor behavior ---
     def get_auto_paste_prompt(self) -> bool:
@@ -248,8 +463,7 @@ class SettingsManager:
             return True
 
     def set_auto_paste_prompt(self, value: bool):
-        self.settings["auto_paste_prompt"] = bool(value)
-        self.save_settings()
+        self.set_value("auto_paste_prompt", bool(value))
 
     # --- Перенос файла настроек ---
     def relocate_settings_file(self, new_directory: str) -> bool:
@@ -261,14 +475,34 @@ class SettingsManager:
             new_dir = Path(new_directory)
             new_dir.mkdir(parents=True, exist_ok=True)
             new_path = new_dir / self.settings_file.name
-            # Сохраняем текущие настройки в новый файл
-            with open(new_path, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, ensure_ascii=False, indent=2)
-            # Обновляем путь и локатор
-            self.settings_file = new_path
-            self._save_locator()
+            with self._save_lock:
+                # Сохраняем текущие настройки в новый файл
+                _atomic_write_json(new_path, self.settings)
+                # Обновляем путь и локатор; отложенная запись (если была) больше не нужна
+                self.settings_file = new_path
+                self._dirty = False
+                self.flush()
+                self._save_locator()
             print(f"✅ Файл настроек перенесён в: {self.settings_file}")
             return True
         except Exception as e:
             print(f"❌ Не удалось перенести файл настроек: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+_shared_manager = None
+_shared_manager_lock = threading.Lock()
+
+
+def get_settings_manager():
+    """
+    Общий для процесса SettingsManager
+
+    Файл настроек читается один раз; GUI, сборки и генераторы работают с одним объектом
+    (вместо нового SettingsManager() с полным разбором JSON на каждую сборку).
+    """
+    global _shared_manager
+    with _shared_manager_lock:
+        if _shared_manager is None:
+            _shared_manager = SettingsManager()
+        return _shared_manager